@@ -1,91 +1,111 @@
 import os
-from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional, List
 import logging
 
 logger = logging.getLogger(__name__)
 
-class Settings(BaseSettings):
-    """Application settings"""
-    model_config = ConfigDict(
-        env_file=".env",
-        case_sensitive=True,
-        extra="allow"
-    )
-    
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+@dataclass(frozen=True)
+class Settings:
+    """Application settings read directly from the environment.
+
+    A plain frozen dataclass instead of pydantic BaseSettings: the config
+    only needs simple env reads with defaults, and skipping the Pydantic
+    model build keeps import/startup cost low. Env-derived fields use
+    default_factory so the environment is read when the instance is built
+    (via get_settings), not at module import.
+    """
     # Base settings
     APP_NAME: str = "پیشگامان سلامت API"
     APP_DESCRIPTION: str = "راهکارهای پیشگیری و سلامت جامع - Backend API"
     APP_VERSION: str = "1.0.0"
-    DEBUG: bool = False
-    
+    DEBUG: bool = field(default_factory=lambda: _env_bool("DEBUG", False))
+
     # API settings
     API_PREFIX: str = "/api"
-    
+    # Disable to skip OpenAPI schema generation and docs (faster startup in production)
+    ENABLE_OPENAPI: bool = field(default_factory=lambda: _env_bool("ENABLE_OPENAPI", True))
+
     # OpenAI settings
-    OPENAI_API_KEY: Optional[str] = None
-    
+    OPENAI_API_KEY: Optional[str] = field(default_factory=lambda: os.environ.get("OPENAI_API_KEY"))
+
     # CORS settings
-    FRONTEND_URL: str = "https://www.wellnesssentinel.ir"
-    CORS_ORIGINS: List[str] = [
+    FRONTEND_URL: str = field(default_factory=lambda: os.environ.get("FRONTEND_URL", "https://www.wellnesssentinel.ir"))
+    CORS_ORIGINS: List[str] = field(default_factory=lambda: [
         "*",
         "http://localhost:3000",
         "http://localhost:5173",
         "http://127.0.0.1:3000",
         "http://127.0.0.1:5173",
         "https://www.wellnesssentinel.ir"
-    ]
+    ])
     CORS_ALLOW_CREDENTIALS: bool = True
-    CORS_ALLOW_METHODS: List[str] = ["*"]
-    CORS_ALLOW_HEADERS: List[str] = ["*"]
-    
+    CORS_ALLOW_METHODS: List[str] = field(default_factory=lambda: ["*"])
+    CORS_ALLOW_HEADERS: List[str] = field(default_factory=lambda: ["*"])
+
     # Server settings
-    HOST: str = "0.0.0.0"
-    PORT: int = 8000
-    
+    HOST: str = field(default_factory=lambda: os.environ.get("HOST", "0.0.0.0"))
+    PORT: int = field(default_factory=lambda: int(os.environ.get("PORT", 8000)))
+
     # Socket.IO settings
-    SOCKETIO_CORS_ORIGINS: List[str] = ["*"]
-    
+    SOCKETIO_CORS_ORIGINS: List[str] = field(default_factory=lambda: ["*"])
+
     # Database settings (for future implementation)
-    DATABASE_URL: Optional[str] = None
-    
+    DATABASE_URL: Optional[str] = field(default_factory=lambda: os.environ.get("DATABASE_URL"))
+
     # Proxy settings
-    HTTP_PROXY: Optional[str] = None
-    HTTPS_PROXY: Optional[str] = None
-    
+    HTTP_PROXY: Optional[str] = field(default_factory=lambda: os.environ.get("HTTP_PROXY"))
+    HTTPS_PROXY: Optional[str] = field(default_factory=lambda: os.environ.get("HTTPS_PROXY"))
+
     # Logging configuration
-    LOG_LEVEL: str = "INFO"
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Load environment variables explicitly
-        self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-        self.FRONTEND_URL = os.getenv("FRONTEND_URL", "https://www.wellnesssentinel.ir")
-        self.PORT = int(os.getenv("PORT", 8000))
-        
-        # Validate critical settings
-        self.validate_settings()
-    
+    LOG_LEVEL: str = field(default_factory=lambda: os.environ.get("LOG_LEVEL", "INFO"))
+
     def validate_settings(self):
-        """Validate critical configuration"""
+        """Validate critical configuration.
+
+        Called once from the app startup hook rather than on every
+        instantiation, so imports (tests, CLI, reload workers) stay cheap.
+        """
         if not self.OPENAI_API_KEY:
             logger.warning("OPENAI_API_KEY not found in environment variables")
         elif not self.OPENAI_API_KEY.startswith('sk-'):
             logger.warning("OPENAI_API_KEY format appears invalid")
-        
-        # Add FRONTEND_URL to CORS_ORIGINS if not already there
-        if self.FRONTEND_URL not in self.CORS_ORIGINS and self.FRONTEND_URL != "*":
-            self.CORS_ORIGINS.append(self.FRONTEND_URL)
-    
+
+    @property
+    def effective_cors_origins(self) -> List[str]:
+        """CORS origins with FRONTEND_URL appended if it isn't already listed.
+
+        The wildcard entry is dropped when credentials are allowed: browsers
+        reject "*" with credentials anyway, and removing it keeps the
+        middleware matching against concrete origins only.
+        """
+        origins = list(self.CORS_ORIGINS)
+        if self.CORS_ALLOW_CREDENTIALS and "*" in origins:
+            origins.remove("*")
+        if self.FRONTEND_URL not in origins and self.FRONTEND_URL != "*":
+            origins.append(self.FRONTEND_URL)
+        return origins
+
     @property
     def has_valid_openai_key(self) -> bool:
         """Check if OpenAI key is present and formatted correctly"""
         return (
-            self.OPENAI_API_KEY and 
-            self.OPENAI_API_KEY.startswith('sk-') and 
+            self.OPENAI_API_KEY and
+            self.OPENAI_API_KEY.startswith('sk-') and
             len(self.OPENAI_API_KEY) > 20
         )
 
-# Create settings instance
-settings = Settings()
+# Lazy settings singleton: the Settings instance (env reads + validation) is
+# only built on first access instead of at import time, so importing config
+# stays cheap for tests, CLI tools and reload workers.
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
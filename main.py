@@ -1,122 +1,208 @@
+import os
+
 from fastapi import FastAPI, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from typing import List, Dict, Optional, Any
-import socketio
-import uvicorn
-import json
+import atexit
+import importlib
+import orjson
 import logging
-import os
-from datetime import datetime
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from collections import deque
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 # Explicitly load environment variables from .env file
 load_dotenv(dotenv_path=".env")
-print("Loaded ENV variables:", dict(os.environ))  # More readable debugging
 
 # Import config
-from config import settings
+from config import get_settings
+from utils.helpers import now_iso
+
+settings = get_settings()
+
+# Hoisted once so route registration doesn't repeat the settings attribute
+# lookup and f-string parse per router
+API_PREFIX = settings.API_PREFIX
 
-# Import routers from original application
-from routes.health_chat import router as health_chat_router
-from routes.risk_assessment import router as risk_assessment_router
-from routes.preventive_featured import router as preventive_featured_router
-from routes.search import router as search_router
-from routes.symptom_checker import router as symptom_checker_router
-from routes.health_exploration import router as health_exploration_router
+# Route modules are imported lazily at startup (see _include_routers below)
+# so that importing main.py doesn't pull in every router's dependency chain
+# (pydantic models, OpenAI SDK, etc.) during cold start.
+ROUTE_MODULES = [
+    ("routes.health_chat", "health-chat", "Health Chat"),
+    ("routes.risk_assessment", "risk-assessment", "Risk Assessment"),
+    ("routes.preventive_featured", "preventive-featured", "Preventive Featured"),
+    ("routes.search", "search", "Search"),
+    ("routes.symptom_checker", "symptom-checker", "Symptom Checker"),
+    ("routes.health_exploration", "health-exploration", "Health Exploration"),
+]
 
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL, "INFO"),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+
+# Move the stream handlers behind a queue serviced by a dedicated thread:
+# request coroutines and background tasks only enqueue the record, so they
+# never hold the logging lock through a blocking stdout write.
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(
+    _log_queue, *logging.getLogger().handlers, respect_handler_level=True
+)
+logging.getLogger().handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
 # Create the FastAPI app
+# Schema generation and docs are disabled entirely when ENABLE_OPENAPI is off
+# (e.g. production), which avoids building the OpenAPI models at startup.
 app = FastAPI(
     title=settings.APP_NAME,
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json" if settings.ENABLE_OPENAPI else None,
+    docs_url="/docs" if settings.ENABLE_OPENAPI else None,
+    redoc_url="/redoc" if settings.ENABLE_OPENAPI else None,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=settings.effective_cors_origins,
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=settings.CORS_ALLOW_METHODS,
     allow_headers=settings.CORS_ALLOW_HEADERS,
+    max_age=86400,  # let browsers cache preflight responses for 24h
 )
 
-# Add global exception handler for better error responses
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Global exception handler caught: {exc}", exc_info=True)
-    return JSONResponse(
-        status_code=500,
-        content={
-            "detail": "Internal server error",
-            "message": "An unexpected error occurred. Please try again later.",
-            "timestamp": datetime.now().isoformat()
-        }
-    )
+# Global error handling as a pure ASGI middleware: unlike an
+# @app.exception_handler, no Request/Response objects are constructed on the
+# happy path, so successful requests pass through with zero extra allocations.
+class ErrorASGIMiddleware:
+    def __init__(self, app):
+        self.app = app
 
-# Include routers from original application with explicit tags and prefixes
-app.include_router(
-    health_chat_router,
-    prefix=f"{settings.API_PREFIX}/health-chat",
-    tags=["Health Chat"]
-)
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-app.include_router(
-    risk_assessment_router,
-    prefix=f"{settings.API_PREFIX}/risk-assessment",
-    tags=["Risk Assessment"]
-)
+        response_started = False
 
-app.include_router(
-    preventive_featured_router,
-    prefix=f"{settings.API_PREFIX}/preventive-featured",
-    tags=["Preventive Featured"]
-)
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-app.include_router(
-    search_router,
-    prefix=f"{settings.API_PREFIX}/search",
-    tags=["Search"]
-)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            logger.error(f"Global exception handler caught: {exc}", exc_info=True)
+            if response_started:
+                raise
+            body = orjson.dumps({
+                "detail": "Internal server error",
+                "message": "An unexpected error occurred. Please try again later.",
+                "timestamp": now_iso()
+            })
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1"))
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
 
-app.include_router(
-    symptom_checker_router,
-    prefix=f"{settings.API_PREFIX}/symptom-checker",
-    tags=["Symptom Checker"]
-)
+app.add_middleware(ErrorASGIMiddleware)
 
-app.include_router(
-    health_exploration_router,
-    prefix=f"{settings.API_PREFIX}/health-exploration",
-    tags=["Health Exploration"]
-)
+# Liveness probes hit the health endpoint every few seconds per pod, making it
+# the hottest path in the app. Answer plain GET probes straight from the ASGI
+# layer with a pre-encoded body, bypassing routing, dependency resolution and
+# response serialization entirely. Requests with a query string (e.g.
+# ?verbose=1) fall through to the full handler below.
+class HealthProbeASGIMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.path = f"{API_PREFIX}/health"
+        self.static_fields = {
+            "status": "healthy",
+            "version": settings.APP_VERSION,
+            "openai_configured": settings.has_valid_openai_key,
+            "api_prefix": API_PREFIX
+        }
+        # (expiry, body, headers) — the serialized body is reused for up to
+        # 1s so back-to-back probes share one encode.
+        self.cached = (0.0, b"", [])
 
-# Create a Socket.IO instance
-sio = socketio.AsyncServer(
-    async_mode='asgi',
-    cors_allowed_origins=settings.SOCKETIO_CORS_ORIGINS
-)
+    def _render(self):
+        now = time.time()
+        expiry, body, headers = self.cached
+        if now >= expiry:
+            payload = dict(self.static_fields)
+            payload["timestamp"] = now_iso()
+            body = orjson.dumps(payload)
+            headers = [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1"))
+            ]
+            self.cached = (now + 1.0, body, headers)
+        return body, headers
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["path"] == self.path
+            and scope["method"] == "GET"
+            and not scope.get("query_string")
+        ):
+            # Cross-origin probes need CORSMiddleware's response headers,
+            # which this fast path sits in front of; any request carrying an
+            # Origin header falls through to the full stack. Same-origin
+            # probes (kubelet, load balancers) keep the fast path.
+            for name, _ in scope["headers"]:
+                if name == b"origin":
+                    break
+            else:
+                body, headers = self._render()
+                await send({"type": "http.response.start", "status": 200, "headers": headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
 
-# Create a Socket.IO app
-socket_app = socketio.ASGIApp(sio)
+app.add_middleware(HealthProbeASGIMiddleware)
 
-# Mount the Socket.IO app
-app.mount("/socket.io", socket_app)
+# Include routers from original application with explicit tags and prefixes.
+# Individual routers can be skipped for lighter deployments by setting e.g.
+# DISABLE_ROUTE_SYMPTOM_CHECKER=1 in the environment.
+def _include_routers(app: FastAPI):
+    for module_name, prefix, tag in ROUTE_MODULES:
+        disable_key = f"DISABLE_ROUTE_{prefix.replace('-', '_').upper()}"
+        if os.environ.get(disable_key):
+            logger.info(f"Router {module_name} disabled via {disable_key}")
+            continue
+        module = importlib.import_module(module_name)
+        app.include_router(
+            module.router,
+            prefix=f"{API_PREFIX}/{prefix}",
+            tags=[tag]
+        )
 
-# Global variables to store connected users and chat history
+# Global variables to store connected users and chat history.
+# chat_history is bounded so long-lived processes don't grow without limit.
 connected_users = {}
-chat_history = []
+chat_history = deque(maxlen=1000)
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -126,72 +212,101 @@ async def root():
         "status": "running"
     }
 
-@app.get(f"{settings.API_PREFIX}/health", tags=["Health Check"])
+@app.get(f"{API_PREFIX}/health", tags=["Health Check"])
 async def health_check():
-    """Enhanced health check with system status"""
+    """Enhanced health check with system status.
+
+    Plain probes are served by HealthProbeASGIMiddleware from a cached
+    body; this handler answers the verbose form (any query string).
+    """
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "version": settings.APP_VERSION,
         "openai_configured": settings.has_valid_openai_key,
         "cors_origins": settings.CORS_ORIGINS,
         "api_prefix": settings.API_PREFIX
     }
 
-@app.get("/debug/config", tags=["Debug"])
-async def debug_config():
-    """Debug endpoint to check configuration (remove in production)"""
-    return {
-        "frontend_url": settings.FRONTEND_URL,
-        "cors_origins": settings.CORS_ORIGINS,
-        "has_openai_key": settings.has_valid_openai_key,
-        "api_prefix": settings.API_PREFIX,
-        "port": settings.PORT,
-        "host": settings.HOST
-    }
+if settings.ENABLE_OPENAPI:
+    @app.get("/debug/config", tags=["Debug"])
+    async def debug_config():
+        """Debug endpoint to check configuration (disabled in production)"""
+        return {
+            "frontend_url": settings.FRONTEND_URL,
+            "cors_origins": settings.CORS_ORIGINS,
+            "has_openai_key": settings.has_valid_openai_key,
+            "api_prefix": settings.API_PREFIX,
+            "port": settings.PORT,
+            "host": settings.HOST
+        }
 
-# Socket.IO event handlers
-@sio.event
-async def connect(sid, environ):
-    logger.info(f"Client connected: {sid}")
-    connected_users[sid] = {"connected_at": datetime.now().isoformat()}
-    await sio.emit('user_count', len(connected_users))
-
-@sio.event
-async def disconnect(sid):
-    logger.info(f"Client disconnected: {sid}")
-    if sid in connected_users:
-        del connected_users[sid]
-    await sio.emit('user_count', len(connected_users))
-
-@sio.event
-async def chat_message(sid, data):
-    logger.info(f"Message from {sid}: {data}")
-    user = connected_users.get(sid, {}).get("username", "Anonymous")
-    message = {
-        "user": user,
-        "message": data.get("message", ""),
-        "timestamp": datetime.now().isoformat()
-    }
-    chat_history.append(message)
-    await sio.emit('chat_message', message)
+# Socket.IO is installed lazily at startup so importing main.py (tests,
+# tooling, single-router use) doesn't pay for the socketio/engineio chain.
+sio = None
 
-@sio.event
-async def set_username(sid, data):
-    username = data.get("username", "Anonymous")
-    if sid in connected_users:
-        connected_users[sid]["username"] = username
-    logger.info(f"User {sid} set username to {username}")
-    await sio.emit('user_joined', {"username": username})
+def _install_socketio(app: FastAPI):
+    global sio
+    if sio is not None:
+        return
+    import socketio
+
+    sio = socketio.AsyncServer(
+        async_mode='asgi',
+        cors_allowed_origins=settings.SOCKETIO_CORS_ORIGINS
+    )
+
+    # Mount the Socket.IO app
+    app.mount("/socket.io", socketio.ASGIApp(sio))
+
+    # Socket.IO event handlers
+    @sio.event
+    async def connect(sid, environ):
+        logger.info("Client connected: %s", sid)
+        connected_users[sid] = {"connected_at": now_iso()}
+        await sio.emit('user_count', len(connected_users))
+
+    @sio.event
+    async def disconnect(sid):
+        logger.info("Client disconnected: %s", sid)
+        if sid in connected_users:
+            del connected_users[sid]
+        await sio.emit('user_count', len(connected_users))
+
+    @sio.event
+    async def chat_message(sid, data):
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Message from %s: %s", sid, data)
+        user = connected_users.get(sid, {}).get("username", "Anonymous")
+        message = {
+            "user": user,
+            "message": data.get("message", ""),
+            "timestamp": now_iso()
+        }
+        chat_history.append(message)
+        await sio.emit('chat_message', message)
+
+    @sio.event
+    async def set_username(sid, data):
+        username = data.get("username", "Anonymous")
+        if sid in connected_users:
+            connected_users[sid]["username"] = username
+        logger.info("User %s set username to %s", sid, username)
+        await sio.emit('user_joined', {"username": username})
 
 # Startup event
 @app.on_event("startup")
 async def startup_event():
+    settings.validate_settings()
+    _include_routers(app)
+    _install_socketio(app)
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"OpenAI API configured: {settings.has_valid_openai_key}")
     logger.info(f"CORS origins: {settings.CORS_ORIGINS}")
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host=settings.HOST,
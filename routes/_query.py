@@ -0,0 +1,111 @@
+"""Shared filter/paginate machinery for the in-memory route collections.
+
+The list endpoints in health_exploration and preventive_featured all reduce
+to the same scan: pick a source sequence (ideally an inverted-index posting
+list), apply a residual predicate, and slice out one page. Keeping that scan
+in one place means a future rewrite — Cython, or a compiled kernel over
+encoded arrays — only has to target this module, not every handler.
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+def filter_paginate(
+    source: Sequence,
+    predicate: Optional[Callable],
+    offset: int,
+    limit: int,
+    total_hint: Optional[int] = None
+) -> Tuple[list, int]:
+    """Scan ``source`` through ``predicate`` and return one page plus the total.
+
+    ``total_hint`` short-circuits counting when the caller already knows the
+    result size (posting-list length, bitmask popcount). Without a hint the
+    scan is a single pass that counts every match but only keeps the page,
+    so memory stays O(limit) regardless of result size.
+    """
+    if predicate is None:
+        total = len(source) if total_hint is None else total_hint
+        return list(source[offset:offset + limit]), total
+
+    end = offset + limit
+    items: list = []
+    total = 0
+    for record in source:
+        if predicate(record):
+            if offset <= total < end:
+                items.append(record)
+            total += 1
+            if total_hint is not None and total >= end:
+                # Page is full and the caller supplied the total; stop early.
+                return items, total_hint
+    return items, total if total_hint is None else total_hint
+
+
+class CollectionIndex:
+    """Inverted category/tag indexes over one ordered collection.
+
+    ``key``/``categories``/``tags`` are accessors so the same class serves
+    dict records and model instances alike. ``sorted_order`` preserves the
+    collection's canonical ordering; posting lists are built from it so
+    filtered results keep that order.
+    """
+
+    def __init__(
+        self,
+        records: Sequence,
+        *,
+        key: Callable,
+        categories: Optional[Callable] = None,
+        tags: Optional[Callable] = None
+    ):
+        self.sorted_order = tuple(records)
+        self.by_id = {key(record): record for record in self.sorted_order}
+        self.by_category: Dict[str, List] = defaultdict(list)
+        self.by_tag: Dict[str, List] = defaultdict(list)
+        self._tags = tags
+        if categories is not None:
+            for record in self.sorted_order:
+                for category in categories(record):
+                    self.by_category[category].append(record)
+        if tags is not None:
+            for record in self.sorted_order:
+                for tag in tags(record):
+                    self.by_tag[tag].append(record)
+
+    def query(
+        self,
+        *,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        predicate: Optional[Callable] = None,
+        offset: int = 0,
+        limit: int = 10
+    ) -> Tuple[list, int]:
+        """Return one page of matching records plus the total match count.
+
+        The most selective available posting list becomes the source; only
+        filters not already covered by that choice remain as predicates.
+        """
+        residual = []
+        if category is not None:
+            source = self.by_category.get(category, ())
+            if tag is not None:
+                tags_of = self._tags
+                residual.append(lambda record: tag in tags_of(record))
+        elif tag is not None:
+            source = self.by_tag.get(tag, ())
+        else:
+            source = self.sorted_order
+        if predicate is not None:
+            residual.append(predicate)
+
+        if not residual:
+            combined = None
+        elif len(residual) == 1:
+            combined = residual[0]
+        else:
+            checks = tuple(residual)
+            combined = lambda record: all(check(record) for check in checks)
+        return filter_paginate(source, combined, offset, limit)
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, Body
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
-import json
-from datetime import datetime
+from typing import List, Dict, Deque, Optional, Any
+from collections import defaultdict, deque
+import asyncio
+import secrets
+import orjson
 import logging
 
+from utils.helpers import now_iso
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -39,10 +43,14 @@ class ChatRoom(BaseModel):
         }
 
 # Mock database (in-memory storage)
+# Messages are kept in bounded deques so memory stays capped under sustained
+# traffic: appends are O(1) and old messages are evicted automatically.
+MAX_MESSAGES_PER_ROOM = 1000
+
 users_db = {}
 active_sessions = {}
 chat_rooms = {}
-chat_messages = {}
+chat_messages: Dict[str, Deque[dict]] = defaultdict(lambda: deque(maxlen=MAX_MESSAGES_PER_ROOM))
 
 # Authentication endpoints
 @router.post("/register")
@@ -55,7 +63,7 @@ async def register_user(user: User):
     users_db[user.email] = {
         "username": user.username,
         "password": user.password,  # Should be hashed in production
-        "created_at": datetime.now().isoformat()
+        "created_at": now_iso()
     }
     
     return {"message": "User registered successfully", "username": user.username}
@@ -70,12 +78,14 @@ async def login_user(user_login: UserLogin):
     if stored_user["password"] != user_login.password:  # Should use secure comparison in production
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    # Create a session (in a real app, use JWT or other secure token method)
-    session_id = f"session_{len(active_sessions) + 1}"
+    # Create a session (in a real app, use JWT or other secure token method).
+    # A random token is collision-free and constant work, unlike the previous
+    # counter derived from len(active_sessions) which repeated after logouts.
+    session_id = secrets.token_urlsafe(16)
     active_sessions[session_id] = {
         "email": user_login.email,
         "username": stored_user["username"],
-        "logged_in_at": datetime.now().isoformat()
+        "logged_in_at": now_iso()
     }
     
     return {
@@ -107,14 +117,14 @@ async def create_chat_room(room: ChatRoom):
     room_data = {
         "name": room.name,
         "description": room.description,
-        "created_at": datetime.now().isoformat()
+        "created_at": now_iso()
     }
     
     # Store in chat_rooms dictionary
     chat_rooms[room.room_id] = room_data
-    
-    # Initialize an empty list for this room's messages
-    chat_messages[room.room_id] = []
+
+    # Initialize the bounded message deque for this room
+    chat_messages[room.room_id]
     
     # Return structured response matching the expected format
     return {
@@ -134,36 +144,37 @@ async def list_chat_rooms():
 @router.get("/rooms/{room_id}")
 async def get_chat_room(room_id: str):
     """Get details about a specific chat room."""
-    if room_id not in chat_rooms:
+    # Single .get() lookup instead of a membership test plus an index
+    room = chat_rooms.get(room_id)
+    if room is None:
         raise HTTPException(status_code=404, detail="Room not found")
-    
-    return {"room_id": room_id, **chat_rooms[room_id]}
+
+    return {"room_id": room_id, **room}
 
 @router.get("/rooms/{room_id}/messages")
 async def get_chat_messages(room_id: str, limit: int = 50):
     """Get messages from a specific chat room."""
-    if room_id not in chat_rooms:
+    if chat_rooms.get(room_id) is None:
         raise HTTPException(status_code=404, detail="Room not found")
     
-    # Return the most recent messages (up to the limit)
-    messages = chat_messages.get(room_id, [])
-    return {"room_id": room_id, "messages": messages[-limit:]}
+    # Return the most recent messages (up to the limit); the deque is bounded
+    # so materializing it stays cheap.
+    messages = chat_messages[room_id]
+    return {"room_id": room_id, "messages": list(messages)[-limit:]}
 
 @router.post("/rooms/{room_id}/messages")
 async def send_message(room_id: str, message: Message):
     """Send a message to a specific chat room."""
-    if room_id not in chat_rooms:
+    if chat_rooms.get(room_id) is None:
         raise HTTPException(status_code=404, detail="Room not found")
     
     # Add timestamp if not provided
     if not message.timestamp:
-        message.timestamp = datetime.now().isoformat()
-    
-    # Add the message to the room
-    if room_id not in chat_messages:
-        chat_messages[room_id] = []
+        message.timestamp = now_iso()
     
-    chat_messages[room_id].append(message.dict())
+    # Add the message to the room (model_dump is the Pydantic v2 native path;
+    # .dict() is a compatibility shim that re-walks the model)
+    chat_messages[room_id].append(message.model_dump(mode="json"))
     
     return {"message": "Message sent", "room_id": room_id}
 
@@ -183,10 +194,25 @@ class ConnectionManager:
             if websocket in self.active_connections[room_id]:
                 self.active_connections[room_id].remove(websocket)
 
-    async def broadcast(self, message: str, room_id: str):
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                await connection.send_text(message)
+    async def broadcast(self, payload: bytes, room_id: str):
+        # Fan out a single pre-serialized payload; each message is encoded
+        # once regardless of how many clients are in the room. Sends run
+        # concurrently so one slow client can't stall the others, and any
+        # connection that errors is pruned from the room.
+        # Snapshot the room before sending: disconnect() can mutate the live
+        # list while the sends are in flight (e.g. the failing client's own
+        # receive loop unwinding), and results are paired positionally with
+        # the connections gather() started with.
+        connections = list(self.active_connections.get(room_id, ()))
+        if not connections:
+            return
+        results = await asyncio.gather(
+            *(connection.send_bytes(payload) for connection in connections),
+            return_exceptions=True
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.disconnect(connection, room_id)
 
 manager = ConnectionManager()
 
@@ -194,38 +220,48 @@ manager = ConnectionManager()
 async def websocket_endpoint(websocket: WebSocket, room_id: str):
     """WebSocket endpoint for real-time chat in a specific room."""
     await manager.connect(websocket, room_id)
+    # Bind once outside the per-message loop to skip repeated attribute lookups
+    log_error = logger.error
     try:
         while True:
-            data = await websocket.receive_text()
-            
+            # Read the raw ASGI event so binary frames skip the forced UTF-8
+            # decode of receive_text(); orjson parses bytes directly. Text
+            # frames from older clients still work.
+            event = await websocket.receive()
+            if event["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(event.get("code", 1000))
+            data = event.get("bytes")
+            if data is None:
+                data = event.get("text", "")
+
             # Parse the message
             try:
-                message_data = json.loads(data)
-                message = Message(
-                    sender=message_data.get("sender", "Anonymous"),
-                    content=message_data.get("content", ""),
-                    timestamp=datetime.now().isoformat()
-                )
-                
+                message_data = orjson.loads(data)
+                # Build the message dict once; it is stored as-is and the
+                # serialized bytes are shared by every broadcast recipient.
+                message = {
+                    "sender": message_data.get("sender", "Anonymous"),
+                    "content": message_data.get("content", ""),
+                    "timestamp": now_iso()
+                }
+
                 # Save the message
-                if room_id not in chat_messages:
-                    chat_messages[room_id] = []
-                chat_messages[room_id].append(message.dict())
-                
+                chat_messages[room_id].append(message)
+
                 # Broadcast the message to all clients in the room
-                await manager.broadcast(json.dumps(message.dict()), room_id)
-                
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON received: {data}")
-                await websocket.send_text(json.dumps({"error": "Invalid message format"}))
-                
+                await manager.broadcast(orjson.dumps(message), room_id)
+
+            except orjson.JSONDecodeError:
+                log_error("Invalid JSON received: %s", data)
+                await websocket.send_bytes(orjson.dumps({"error": "Invalid message format"}))
+
     except WebSocketDisconnect:
         manager.disconnect(websocket, room_id)
         await manager.broadcast(
-            json.dumps({
+            orjson.dumps({
                 "sender": "system",
                 "content": "A user has left the chat",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }),
             room_id
         )
@@ -1,7 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, status, Response
-from fastapi.responses import JSONResponse, FileResponse
-from typing import List, Dict, Optional, Any
+from fastapi.responses import JSONResponse, FileResponse, ORJSONResponse, StreamingResponse
+from typing import List, Dict, Iterator, Optional, Any
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+
+from routes._query import filter_paginate
 import logging
+import orjson
+import re
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -11,7 +18,8 @@ logger = logging.getLogger(__name__)
 # Create router with proper prefix
 router = APIRouter(
     prefix="/api/health-exploration",  # Added prefix to match API path
-    tags=["Health Exploration"]
+    tags=["Health Exploration"],
+    default_response_class=ORJSONResponse  # orjson handles datetime natively
 )
 
 # Define models
@@ -42,6 +50,36 @@ class PaperListResponse(BaseModel):
     per_page: int
     total_pages: int
 
+# Internal storage for papers: a slots dataclass instead of a Pydantic model.
+# Instances carry no __dict__, attribute access in the filter loops skips
+# Pydantic's field machinery, and frozen keeps the shared records immutable
+# (mutable counters live in the arrays below). orjson serializes dataclasses
+# natively, so the handlers hand these straight to the response layer; the
+# Pydantic models above remain as the documented response shape.
+@dataclass(slots=True, frozen=True)
+class PaperData:
+    id: str
+    title: str
+    authors: List[str]
+    publication_date: datetime
+    journal: str
+    abstract: str
+    categories: List[str]
+    keywords: List[str]
+    is_featured: bool
+    views: int
+    downloads: int
+    # Derived, not stored per sample: every paper's URL follows the same
+    # pattern, so it is computed once at construction instead of being
+    # rebuilt (or redundantly hand-written) per record
+    download_url: str = ""
+
+    def __post_init__(self):
+        if not self.download_url:
+            object.__setattr__(
+                self, "download_url", f"/api/health-exploration/papers/{self.id}/download"
+            )
+
 # Mock database (replace with actual database implementation)
 # Sample paper categories
 paper_categories = [
@@ -54,7 +92,7 @@ paper_categories = [
 
 # Sample papers
 sample_papers = [
-    Paper(
+    PaperData(
         id="1",
         title="Advances in Cardiovascular Disease Prevention",
         authors=["John Doe", "Jane Smith"],
@@ -64,11 +102,10 @@ sample_papers = [
         categories=["1"],  # Cardiology
         keywords=["cardiovascular", "prevention", "lifestyle", "pharmacology"],
         is_featured=True,
-        download_url="/api/health-exploration/papers/1/download",
         views=250,
         downloads=120
     ),
-    Paper(
+    PaperData(
         id="2",
         title="Understanding Alzheimer's Disease Progression",
         authors=["Emily Johnson", "Michael Brown"],
@@ -78,11 +115,10 @@ sample_papers = [
         categories=["2"],  # Neurology
         keywords=["alzheimer's", "neurodegeneration", "cognitive decline", "treatment"],
         is_featured=True,
-        download_url="/api/health-exploration/papers/2/download",
         views=180,
         downloads=95
     ),
-    Paper(
+    PaperData(
         id="3",
         title="Impact of COVID-19 on Mental Health",
         authors=["Sarah Wilson", "Robert Davis"],
@@ -92,11 +128,10 @@ sample_papers = [
         categories=["4", "5"],  # Infectious Diseases, Public Health
         keywords=["COVID-19", "mental health", "pandemic", "psychological impact"],
         is_featured=True,
-        download_url="/api/health-exploration/papers/3/download",
         views=320,
         downloads=210
     ),
-    Paper(
+    PaperData(
         id="4",
         title="Novel Approaches to Cancer Immunotherapy",
         authors=["David Lee", "Susan Miller"],
@@ -106,11 +141,10 @@ sample_papers = [
         categories=["3"],  # Oncology
         keywords=["cancer", "immunotherapy", "clinical trials", "oncology"],
         is_featured=False,
-        download_url="/api/health-exploration/papers/4/download",
         views=150,
         downloads=80
     ),
-    Paper(
+    PaperData(
         id="5",
         title="Genetic Factors in Heart Disease",
         authors=["Linda Wilson", "Thomas Clark"],
@@ -120,7 +154,6 @@ sample_papers = [
         categories=["1"],  # Cardiology
         keywords=["genetics", "heart disease", "risk factors", "genomics"],
         is_featured=False,
-        download_url="/api/health-exploration/papers/5/download",
         views=130,
         downloads=65
     )
@@ -129,9 +162,83 @@ sample_papers = [
 # Cache dictionaries for faster lookups
 paper_dict = {paper.id: paper for paper in sample_papers}
 
+# Precomputed search blob per paper: title, abstract and keywords lowercased
+# once at import and joined with "\x01", which can't appear in a query, so
+# containment within any single field is preserved. The fallback substring
+# scan is then one C-level containment check per paper with no per-request
+# lowercasing or per-field dispatch.
+_search_blob_by_id = {
+    p.id: "\x01".join((p.title.lower(), p.abstract.lower(), *(k.lower() for k in p.keywords)))
+    for p in sample_papers
+}
+
+# Featured papers never change for the mock data, so filter them once; the
+# tuple keeps the shared sequence safe from request-time mutation
+_featured_papers = tuple(p for p in sample_papers if p.is_featured)
+
+# Constant category payload, serialized once at import
+_CATEGORIES_JSON = orjson.dumps([c.model_dump() for c in paper_categories])
+
+# Inverted index over paper positions: substring -> integer bitmask, bit i
+# set if sample_papers[i] contains the substring inside any token. Every
+# >=3-char substring of every token is posted, so the mask intersection is a
+# guaranteed superset of the substring filter below — a \w+ query token can
+# never span the non-word characters between corpus tokens. Masks compose
+# with bitwise AND — one machine-word operation per 64 papers instead of
+# per-element set work. The same layout maps directly onto a NumPy uint64
+# mask scan if the corpus outgrows Python ints.
+_token_re = re.compile(r"\w+", re.UNICODE)
+
+def _tokenize(text: str) -> List[str]:
+    return _token_re.findall(text.lower())
+
+_id_to_idx = {p.id: i for i, p in enumerate(sample_papers)}
+
+# Mutable counters live outside the shared Pydantic models: one contiguous
+# 64-bit slot per paper, indexed by position, so hot-path increments are a
+# single add that never dirties the model objects, and a background task can
+# flush the arrays to a real store in one batch later.
+_view_counts = array("Q", (p.views for p in sample_papers))
+_download_counts = array("Q", (p.downloads for p in sample_papers))
+
+_token_masks: Dict[str, int] = defaultdict(int)
+for _i, _p in enumerate(sample_papers):
+    for _tok in _tokenize(_p.title) + _tokenize(_p.abstract) + _tokenize(" ".join(_p.keywords)):
+        for _start in range(len(_tok) - 2):
+            for _end in range(_start + 3, len(_tok) + 1):
+                _token_masks[_tok[_start:_end]] |= 1 << _i
+
+# Category filters use the same positional-mask encoding: each category id
+# maps to a bitmask of the papers carrying it, so category and token
+# constraints compose with a single AND instead of list membership tests.
+_category_masks: Dict[str, int] = defaultdict(int)
+for _i, _p in enumerate(sample_papers):
+    for _c in _p.categories:
+        _category_masks[_c] |= 1 << _i
+
+def _mask_positions(mask: int) -> Iterator[int]:
+    """Yield the set-bit positions of a posting mask in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _paper_payload(paper: PaperData) -> dict:
+    """Dump a paper with the live counters spliced in.
+
+    The frozen records keep their import-time views/downloads; every
+    serialization path copies the current array values into the payload so
+    listings stay consistent with the detail and download endpoints.
+    """
+    idx = _id_to_idx[paper.id]
+    payload = asdict(paper)
+    payload["views"] = _view_counts[idx]
+    payload["downloads"] = _download_counts[idx]
+    return payload
+
 # API Endpoints
 
-@router.get("/papers", response_model=PaperListResponse, tags=["Papers"])
+@router.get("/papers", tags=["Papers"])
 async def get_papers(
     page: int = 1, 
     per_page: int = 10, 
@@ -147,71 +254,115 @@ async def get_papers(
     - category: Filter by category ID
     - search: Search term for paper title or abstract
     """
-    logger.info(f"Retrieving papers with page={page}, per_page={per_page}, category={category}, search={search}")
-    
-    # Filter papers based on query parameters
-    filtered_papers = sample_papers
+    logger.info("Retrieving papers with page=%s, per_page=%s, category=%s, search=%s", page, per_page, category, search)
     
-    # Filter by category if provided
-    if category:
-        filtered_papers = [p for p in filtered_papers if category in p.categories]
-    
-    # Filter by search term if provided
-    if search:
-        search_lower = search.lower()
-        filtered_papers = [
-            p for p in filtered_papers 
-            if search_lower in p.title.lower() or search_lower in p.abstract.lower() or 
-            any(search_lower in keyword.lower() for keyword in p.keywords)
-        ]
-    
-    # Calculate pagination
-    total = len(filtered_papers)
+    # Narrow the scan through the posting masks when every query token is
+    # long enough to be posted — the path depends only on the query, never on
+    # what the corpus happens to contain. The masks are a superset of the
+    # substring matches, so the blob predicate below always decides
+    # membership; the result semantics is the substring filter regardless of
+    # which path narrowed the scan.
+    search_lower = search.lower() if search else None
+    candidate_mask = None
+    if search_lower:
+        tokens = _tokenize(search_lower)
+        if tokens and all(len(t) >= 3 for t in tokens):
+            # A token with no posting means no paper can match
+            candidate_mask = _token_masks.get(tokens[0], 0)
+            for token in tokens[1:]:
+                candidate_mask &= _token_masks.get(token, 0)
+
+    # The category constraint is a positional mask too (unknown categories
+    # resolve to an empty mask), so it combines with the search candidates
+    # in a single AND.
+    cat_mask = _category_masks.get(category, 0) if category else None
+    if cat_mask is not None:
+        candidate_mask = cat_mask if candidate_mask is None else candidate_mask & cat_mask
+
+    if candidate_mask is not None:
+        source = [sample_papers[idx] for idx in _mask_positions(candidate_mask)]
+    else:
+        source = sample_papers
+
+    if search_lower:
+        def predicate(paper: PaperData) -> bool:
+            return search_lower in _search_blob_by_id[paper.id]
+    else:
+        predicate = None
+
+    # Total first, so the page number can be clamped before slicing; the
+    # predicate scan runs only over the mask-narrowed candidates.
+    if predicate is None:
+        total = len(source)
+    else:
+        total = sum(1 for paper in source if predicate(paper))
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
-    
+
     # Ensure valid page number
     if page < 1:
         page = 1
     elif page > total_pages and total_pages > 0:
         page = total_pages
-    
-    # Calculate slice indices for pagination
+
+    # Calculate the slice offset for pagination
     start_idx = (page - 1) * per_page
-    end_idx = min(start_idx + per_page, total)
-    
-    # Get paginated papers
-    paginated_papers = filtered_papers[start_idx:end_idx]
+
+    # Pull just the requested page through the shared scan
+    paginated_papers, _ = filter_paginate(source, predicate, start_idx, per_page, total_hint=total)
     
-    return PaperListResponse(
-        papers=paginated_papers,
-        total=total,
-        page=page,
-        per_page=per_page,
-        total_pages=total_pages
-    )
+    # Stream the page paper by paper: bytes start flowing before the whole
+    # payload is encoded and peak memory stays at one paper regardless of
+    # per_page. PaperData serializes natively through orjson; see
+    # PaperListResponse for the documented shape.
+    async def _stream():
+        yield b'{"papers":['
+        first = True
+        for paper in paginated_papers:
+            if not first:
+                yield b","
+            first = False
+            yield orjson.dumps(_paper_payload(paper))
+        # Close the array, then splice in the pagination envelope (the
+        # leading "{" of the envelope dump is dropped to continue the
+        # enclosing object)
+        yield b"],"
+        yield orjson.dumps({
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": total_pages
+        })[1:]
 
-@router.get("/papers/{paper_id}", response_model=Paper, tags=["Papers"])
+    return StreamingResponse(_stream(), media_type="application/json")
+
+@router.get("/papers/{paper_id}", tags=["Papers"])
 async def get_paper_details(paper_id: str):
     """
     Get detailed information about a specific paper by ID.
-    
+
     Parameters:
     - paper_id: The ID of the paper
     """
-    logger.info(f"Retrieving details for paper ID: {paper_id}")
-    
+    logger.info("Retrieving details for paper ID: %s", paper_id)
+
     # Check if paper exists
-    if paper_id not in paper_dict:
+    paper = paper_dict.get(paper_id)
+    if paper is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Paper with ID {paper_id} not found"
         )
-    
-    # Increment view count (in a real app, this would be a database update)
-    paper = paper_dict[paper_id]
-    paper.views += 1
-    
-    return paper
+
+    # Increment the view counter (in a real app, this would be a database
+    # update, batched from the counter array)
+    idx = _id_to_idx[paper_id]
+    _view_counts[idx] += 1
+
+    # The stored Paper is already validated, so re-running it through a
+    # response_model would only repeat Pydantic validation; serialize the
+    # dump straight to bytes, with the live counters copied into the payload
+    # rather than written back to the shared model.
+    return Response(content=orjson.dumps(_paper_payload(paper)), media_type="application/json")
 
 @router.get("/papers/{paper_id}/download", tags=["Papers"])
 async def download_paper(paper_id: str):
@@ -221,19 +372,21 @@ async def download_paper(paper_id: str):
     Parameters:
     - paper_id: The ID of the paper
     """
-    logger.info(f"Processing download request for paper ID: {paper_id}")
+    logger.info("Processing download request for paper ID: %s", paper_id)
     
     # Check if paper exists
-    if paper_id not in paper_dict:
+    paper = paper_dict.get(paper_id)
+    if paper is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Paper with ID {paper_id} not found"
         )
-    
-    # Increment download count (in a real app, this would be a database update)
-    paper = paper_dict[paper_id]
-    paper.downloads += 1
-    
+
+    # Increment the download counter (in a real app, this would be a database
+    # update, batched from the counter array)
+    idx = _id_to_idx[paper_id]
+    _download_counts[idx] += 1
+
     # In a real implementation, you would return the actual file
     # For this example, we'll return a JSON response
     return JSONResponse(
@@ -241,7 +394,7 @@ async def download_paper(paper_id: str):
         content={
             "message": f"Download initiated for paper: {paper.title}",
             "paper_id": paper_id,
-            "downloads": paper.downloads,
+            "downloads": _download_counts[idx],
             "note": "In a real implementation, this would return a file download."
         }
     )
@@ -254,15 +407,16 @@ async def download_paper(paper_id: str):
     #     filename=f"{paper.title.replace(' ', '_')}.pdf"
     # )
 
-@router.get("/papers/categories", response_model=List[PaperCategory], tags=["Categories"])
+@router.get("/papers/categories", tags=["Categories"])
 async def get_paper_categories():
     """
     Get a list of all paper categories.
     """
     logger.info("Retrieving all paper categories")
-    return paper_categories
+    # The category list is constant; serve the bytes serialized at import
+    return Response(content=_CATEGORIES_JSON, media_type="application/json")
 
-@router.get("/papers/featured", response_model=List[Paper], tags=["Featured"])
+@router.get("/papers/featured", tags=["Featured"])
 async def get_featured_papers(limit: int = 3):
     """
     Get a list of featured papers.
@@ -270,9 +424,8 @@ async def get_featured_papers(limit: int = 3):
     Parameters:
     - limit: Maximum number of featured papers to return (default: 3)
     """
-    logger.info(f"Retrieving featured papers with limit={limit}")
-    
-    featured_papers = [p for p in sample_papers if p.is_featured]
-    
-    # Return only the specified number of featured papers
-    return featured_papers[:limit]
+    logger.info("Retrieving featured papers with limit=%s", limit)
+
+    # Return only the specified number of featured papers, with the live
+    # counters spliced in so the listing doesn't drift from the detail view
+    return ORJSONResponse([_paper_payload(paper) for paper in _featured_papers[:limit]])
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, Query, Path
+from fastapi import APIRouter, HTTPException, Query, Path, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+import orjson
 from typing import List, Dict, Optional, Any
+from operator import itemgetter
 from datetime import datetime
 import logging
 
-router = APIRouter()
+from routes._query import CollectionIndex
+
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 # Models
@@ -111,6 +116,43 @@ categories_db = [
     }
 ]
 
+# Articles sorted newest-first once at import; a tuple makes the presorted
+# order immutable, so no handler can accidentally re-sort or mutate the shared
+# sequence at request time
+_articles_sorted_desc = tuple(sorted(articles_db, key=lambda article: article["published_date"], reverse=True))
+
+# O(1) id lookups for the detail endpoints instead of per-request list scans
+_articles_by_id = {article["id"]: article for article in articles_db}
+_resources_by_id = {resource["id"]: resource for resource in resources_db}
+_categories_by_id = {category["id"]: category for category in categories_db}
+
+# Article records never change, so the detail endpoint serves bytes
+# serialized once at import instead of re-validating through the
+# response model on every hit
+_article_json_by_id = {article["id"]: orjson.dumps(article) for article in articles_db}
+
+# O(1) tag membership sets for article filtering, attached after the JSON
+# cache above so they never leak into serialized payloads; the list-typed
+# fields stay as the response representation. Category filtering goes through
+# the CollectionIndex posting lists, so no per-record category set is needed.
+for _record in articles_db:
+    _record["_tags_set"] = frozenset(_record["tags"])
+
+# Shared inverted indexes (routes/_query.py): filtered listings start from
+# the matching posting list and page through the common scan. Built from the
+# presorted articles so filtered results keep the newest-first order.
+_article_index = CollectionIndex(
+    _articles_sorted_desc,
+    key=itemgetter("id"),
+    categories=itemgetter("categories"),
+    tags=itemgetter("_tags_set")
+)
+_resource_index = CollectionIndex(
+    resources_db,
+    key=itemgetter("id"),
+    categories=itemgetter("categories")
+)
+
 # Endpoints for Articles
 @router.get("/articles", response_model=List[Article])
 async def get_articles(
@@ -120,46 +162,24 @@ async def get_articles(
     offset: int = Query(0, ge=0, description="Number of articles to skip")
 ):
     """Get a list of preventive healthcare articles with optional filtering."""
-    filtered_articles = articles_db
-    
-    # Apply category filter if provided
-    if category:
-        filtered_articles = [
-            article for article in filtered_articles
-            if category in article["categories"]
-        ]
-    
-    # Apply tag filter if provided
-    if tag:
-        filtered_articles = [
-            article for article in filtered_articles
-            if tag in article["tags"]
-        ]
-    
-    # Sort by published date (newest first)
-    filtered_articles.sort(key=lambda x: x["published_date"], reverse=True)
-    
-    # Apply pagination
-    paginated_articles = filtered_articles[offset:offset + limit]
-    
-    return paginated_articles
+    articles, _ = _article_index.query(category=category, tag=tag, offset=offset, limit=limit)
+    return articles
 
-@router.get("/articles/{article_id}", response_model=Article)
+@router.get("/articles/{article_id}")
 async def get_article(article_id: str = Path(..., description="The ID of the article to get")):
     """Get a specific article by its ID."""
-    for article in articles_db:
-        if article["id"] == article_id:
-            return article
-    
-    raise HTTPException(status_code=404, detail=f"Article with ID {article_id} not found")
+    body = _article_json_by_id.get(article_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Article with ID {article_id} not found")
+
+    return Response(content=body, media_type="application/json")
 
 @router.get("/featured-articles", response_model=List[Article])
 async def get_featured_articles(limit: int = Query(3, ge=1, le=10)):
     """Get a list of featured articles for homepage display."""
     # In a real application, this might have specific criteria for "featured" status
     # Here we'll just return the most recent articles
-    sorted_articles = sorted(articles_db, key=lambda x: x["published_date"], reverse=True)
-    return sorted_articles[:limit]
+    return _articles_sorted_desc[:limit]
 
 # Added missing endpoint for preventive-featured/articles
 @router.get("/preventive-featured/articles", response_model=List[Article])
@@ -170,29 +190,8 @@ async def get_preventive_featured_articles(
     offset: int = Query(0, ge=0, description="Number of articles to skip")
 ):
     """Get a list of preventive healthcare articles with optional filtering."""
-    filtered_articles = articles_db
-    
-    # Apply category filter if provided
-    if category:
-        filtered_articles = [
-            article for article in filtered_articles
-            if category in article["categories"]
-        ]
-    
-    # Apply tag filter if provided
-    if tag:
-        filtered_articles = [
-            article for article in filtered_articles
-            if tag in article["tags"]
-        ]
-    
-    # Sort by published date (newest first)
-    filtered_articles.sort(key=lambda x: x["published_date"], reverse=True)
-    
-    # Apply pagination
-    paginated_articles = filtered_articles[offset:offset + limit]
-    
-    return paginated_articles
+    articles, _ = _article_index.query(category=category, tag=tag, offset=offset, limit=limit)
+    return articles
 
 # Endpoints for Resources
 @router.get("/resources", response_model=List[PreventiveResource])
@@ -203,35 +202,23 @@ async def get_resources(
     offset: int = Query(0, ge=0)
 ):
     """Get a list of preventive healthcare resources with optional filtering."""
-    filtered_resources = resources_db
-    
-    # Apply category filter if provided
-    if category:
-        filtered_resources = [
-            resource for resource in filtered_resources
-            if category in resource["categories"]
-        ]
-    
-    # Apply resource type filter if provided
     if resource_type:
-        filtered_resources = [
-            resource for resource in filtered_resources
-            if resource["resource_type"] == resource_type
-        ]
-    
-    # Apply pagination
-    paginated_resources = filtered_resources[offset:offset + limit]
-    
-    return paginated_resources
+        predicate = lambda resource: resource["resource_type"] == resource_type
+    else:
+        predicate = None
+    resources, _ = _resource_index.query(
+        category=category, predicate=predicate, offset=offset, limit=limit
+    )
+    return resources
 
 @router.get("/resources/{resource_id}", response_model=PreventiveResource)
 async def get_resource(resource_id: str = Path(..., description="The ID of the resource to get")):
     """Get a specific resource by its ID."""
-    for resource in resources_db:
-        if resource["id"] == resource_id:
-            return resource
-    
-    raise HTTPException(status_code=404, detail=f"Resource with ID {resource_id} not found")
+    resource = _resources_by_id.get(resource_id)
+    if resource is None:
+        raise HTTPException(status_code=404, detail=f"Resource with ID {resource_id} not found")
+
+    return resource
 
 # Endpoints for Categories
 @router.get("/categories", response_model=List[Category])
@@ -249,11 +236,11 @@ async def get_categories(parent_id: Optional[str] = Query(None, description="Fil
 @router.get("/categories/{category_id}", response_model=Category)
 async def get_category(category_id: str = Path(..., description="The ID of the category to get")):
     """Get a specific category by its ID."""
-    for category in categories_db:
-        if category["id"] == category_id:
-            return category
-    
-    raise HTTPException(status_code=404, detail=f"Category with ID {category_id} not found")
+    category = _categories_by_id.get(category_id)
+    if category is None:
+        raise HTTPException(status_code=404, detail=f"Category with ID {category_id} not found")
+
+    return category
 
 @router.get("/categories/{category_id}/subcategories", response_model=List[Category])
 async def get_subcategories(category_id: str = Path(..., description="The parent category ID")):
@@ -265,93 +252,100 @@ async def get_subcategories(category_id: str = Path(..., description="The parent
     
     return filtered_subcategories
 
-# Health knowledge base endpoints
-@router.get("/health-topics")
-async def get_health_topics():
-    """Get a list of common health topics for preventive care."""
-    topics = [
+# Health knowledge base data. The payloads are constant, so they are
+# serialized to bytes once at import and the handlers return those bytes
+# directly — no Pydantic/json work on the hot path.
+health_topics = [
+    {
+        "id": "topic1",
+        "name": "پیشگیری از بیماری‌های قلبی",
+        "description": "اطلاعات جامع درباره پیشگیری از بیماری‌های قلبی",
+        "related_categories": ["cat1"]
+    },
+    {
+        "id": "topic2",
+        "name": "سبک زندگی سالم",
+        "description": "راهنمای جامع برای داشتن سبک زندگی سالم",
+        "related_categories": ["cat4"]
+    },
+    {
+        "id": "topic3",
+        "name": "غربالگری‌های ضروری",
+        "description": "آشنایی با آزمایشات غربالگری مهم در سنین مختلف",
+        "related_categories": ["cat3"]
+    }
+]
+
+health_calendar = {
+    "screenings": [
+        {
+            "name": "فشار خون",
+            "frequency": "سالانه",
+            "recommended_ages": "۱۸ سال به بالا",
+            "gender": "همه"
+        },
         {
-            "id": "topic1",
-            "name": "پیشگیری از بیماری‌های قلبی",
-            "description": "اطلاعات جامع درباره پیشگیری از بیماری‌های قلبی",
-            "related_categories": ["cat1"]
+            "name": "کلسترول",
+            "frequency": "هر ۴-۶ سال",
+            "recommended_ages": "۲۰ سال به بالا",
+            "gender": "همه"
         },
         {
-            "id": "topic2",
-            "name": "سبک زندگی سالم",
-            "description": "راهنمای جامع برای داشتن سبک زندگی سالم",
-            "related_categories": ["cat4"]
+            "name": "ماموگرافی",
+            "frequency": "هر ۱-۲ سال",
+            "recommended_ages": "۴۰-۷۵ سال",
+            "gender": "زنان"
         },
         {
-            "id": "topic3",
-            "name": "غربالگری‌های ضروری",
-            "description": "آشنایی با آزمایشات غربالگری مهم در سنین مختلف",
-            "related_categories": ["cat3"]
+            "name": "کولونوسکوپی",
+            "frequency": "هر ۱۰ سال",
+            "recommended_ages": "۴۵-۷۵ سال",
+            "gender": "همه"
         }
     ]
-    
-    return {"topics": topics}
+}
+
+preventive_tips = [
+    {
+        "id": "tip1",
+        "title": "کاهش مصرف نمک",
+        "content": "محدود کردن مصرف نمک به کمتر از ۵ گرم در روز می‌تواند به کاهش فشار خون کمک کند.",
+        "category": "فشار خون"
+    },
+    {
+        "id": "tip2",
+        "title": "ورزش منظم",
+        "content": "حداقل ۱۵۰ دقیقه فعالیت بدنی متوسط در هفته برای سلامت قلب مفید است.",
+        "category": "قلب"
+    },
+    {
+        "id": "tip3",
+        "title": "مصرف میوه و سبزیجات",
+        "content": "روزانه حداقل ۵ وعده میوه و سبزیجات مصرف کنید.",
+        "category": "تغذیه"
+    }
+]
+
+_HEALTH_TOPICS_JSON = orjson.dumps({"topics": health_topics})
+_HEALTH_CALENDAR_JSON = orjson.dumps(health_calendar)
+_PREVENTIVE_TIPS_JSON = orjson.dumps({"tips": preventive_tips})
+
+# Health knowledge base endpoints
+@router.get("/health-topics")
+async def get_health_topics():
+    """Get a list of common health topics for preventive care."""
+    return Response(content=_HEALTH_TOPICS_JSON, media_type="application/json")
 
 @router.get("/health-calendar")
 async def get_health_calendar():
     """Get a calendar of recommended health screenings by age and gender."""
-    calendar = {
-        "screenings": [
-            {
-                "name": "فشار خون",
-                "frequency": "سالانه",
-                "recommended_ages": "۱۸ سال به بالا",
-                "gender": "همه"
-            },
-            {
-                "name": "کلسترول",
-                "frequency": "هر ۴-۶ سال",
-                "recommended_ages": "۲۰ سال به بالا",
-                "gender": "همه"
-            },
-            {
-                "name": "ماموگرافی",
-                "frequency": "هر ۱-۲ سال",
-                "recommended_ages": "۴۰-۷۵ سال",
-                "gender": "زنان"
-            },
-            {
-                "name": "کولونوسکوپی",
-                "frequency": "هر ۱۰ سال",
-                "recommended_ages": "۴۵-۷۵ سال",
-                "gender": "همه"
-            }
-        ]
-    }
-    
-    return calendar
+    return Response(content=_HEALTH_CALENDAR_JSON, media_type="application/json")
 
 @router.get("/preventive-tips")
 async def get_preventive_tips(category: Optional[str] = None):
     """Get daily preventive health tips, optionally filtered by category."""
-    tips = [
-        {
-            "id": "tip1",
-            "title": "کاهش مصرف نمک",
-            "content": "محدود کردن مصرف نمک به کمتر از ۵ گرم در روز می‌تواند به کاهش فشار خون کمک کند.",
-            "category": "فشار خون"
-        },
-        {
-            "id": "tip2",
-            "title": "ورزش منظم",
-            "content": "حداقل ۱۵۰ دقیقه فعالیت بدنی متوسط در هفته برای سلامت قلب مفید است.",
-            "category": "قلب"
-        },
-        {
-            "id": "tip3",
-            "title": "مصرف میوه و سبزیجات",
-            "content": "روزانه حداقل ۵ وعده میوه و سبزیجات مصرف کنید.",
-            "category": "تغذیه"
-        }
-    ]
-    
     if category:
-        filtered_tips = [tip for tip in tips if tip["category"] == category]
+        filtered_tips = [tip for tip in preventive_tips if tip["category"] == category]
         return {"tips": filtered_tips}
-    
-    return {"tips": tips}
+
+    return Response(content=_PREVENTIVE_TIPS_JSON, media_type="application/json")
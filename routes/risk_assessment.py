@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Body
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Body, Response
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 from typing import List, Dict, Optional, Any
+from collections import namedtuple
+import bisect
 import json
+import orjson
+import time
 from datetime import datetime
 import logging
 
@@ -10,6 +14,11 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Response payloads are generated server-side from already-validated input,
+# so they skip Pydantic validation via model_construct. Flip to False to
+# re-enable full response validation during development.
+TRUSTED_INTERNAL = True
+
 # Models
 class HealthParameter(BaseModel):
     name: str
@@ -41,9 +50,10 @@ class RiskAssessmentRequest(BaseModel):
     medications: Optional[List[str]] = Field(None, example=["ibuprofen"])
     sleep_hours: Optional[float] = Field(None, ge=0, le=24, example=7.5)
     stress_level: Optional[int] = Field(None, ge=0, le=10, example=5)
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(
+        extra="ignore",
+        json_schema_extra={
             "example": {
                 "age": 35,
                 "gender": "male",
@@ -66,6 +76,7 @@ class RiskAssessmentRequest(BaseModel):
                 "stress_level": 5
             }
         }
+    )
 
 class RiskAssessmentResponse(BaseModel):
     bmi: float
@@ -75,9 +86,9 @@ class RiskAssessmentResponse(BaseModel):
     risk_categories: Dict[str, Dict[str, Any]]
     recommendations: List[str]
     next_steps: List[str]
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "bmi": 22.9,
                 "bmi_category": "Normal weight",
@@ -105,6 +116,125 @@ class RiskAssessmentResponse(BaseModel):
                 ]
             }
         }
+    )
+
+# Batch payloads decode through one pydantic-core call instead of N
+# per-item constructor round-trips
+_REQ_LIST_ADAPTER = TypeAdapter(List[RiskAssessmentRequest])
+
+# Constant recommendation strings, next steps and weights hoisted to module
+# scope so every request references the same objects instead of rebuilding
+# the literals
+_REC_AGE = "Age is a non-modifiable risk factor. Focus on other health parameters."
+_REC_HBP = "Consider dietary changes and regular monitoring."
+_REC_CHOL = "Limit saturated fats and increase physical activity."
+_REC_SMOKING = "Quitting smoking significantly reduces cardiovascular risk."
+_REC_OBESITY = "Focus on weight management through diet and exercise."
+_REC_OVERWEIGHT = "Modest weight loss can improve metabolic health."
+_REC_GLUCOSE = "Monitor blood sugar and consider dietary adjustments."
+_REC_EXERCISE = "Aim for at least 150 minutes of moderate exercise per week."
+_REC_HEALTHY = "Maintain your current healthy lifestyle."
+_REC_CHECKUP = "Regular check-ups are recommended."
+
+_NEXT_STEPS = [
+    "Consult with a healthcare provider to discuss these results",
+    "Set up regular health check-ups",
+    "Track your progress using our health tracker"
+]
+
+# Static catalog payloads serialized once at import; the endpoints return
+# the prebuilt bytes instead of re-encoding the same dicts per request
+_RISK_FACTOR_CATALOG = {
+    "risk_factors": [
+        {
+            "id": "bmi",
+            "name": "Body Mass Index",
+            "description": "A measure of body fat based on height and weight",
+            "input_parameters": ["height", "weight"]
+        },
+        {
+            "id": "blood_pressure",
+            "name": "Blood Pressure",
+            "description": "The pressure of blood against the walls of arteries",
+            "input_parameters": ["systolic_bp", "diastolic_bp"]
+        },
+        {
+            "id": "cholesterol",
+            "name": "Cholesterol Levels",
+            "description": "Levels of lipids in the blood",
+            "input_parameters": ["cholesterol", "hdl", "ldl", "triglycerides"]
+        },
+        # Add more risk factors
+    ]
+}
+_FACTORS_JSON = orjson.dumps(_RISK_FACTOR_CATALOG)
+
+_RECOMMENDATIONS = {
+    "bmi": {
+        "underweight": [
+            "Consult with a nutritionist for a healthy weight gain plan",
+            "Focus on nutrient-dense foods",
+            "Include strength training in your exercise routine"
+        ],
+        "normal": [
+            "Maintain your current healthy habits",
+            "Regular exercise and balanced diet"
+        ],
+        "overweight": [
+            "Aim for 150-300 minutes of moderate exercise per week",
+            "Focus on portion control",
+            "Increase intake of fruits, vegetables and whole grains"
+        ],
+        "obesity": [
+            "Consult with healthcare provider for a personalized weight management plan",
+            "Set realistic weight loss goals (1-2 pounds per week)",
+            "Consider keeping a food and activity journal"
+        ]
+    },
+    "blood_pressure": {
+        "normal": [
+            "Maintain healthy lifestyle habits",
+            "Check blood pressure annually"
+        ],
+        "elevated": [
+            "Reduce sodium intake",
+            "Regular physical activity",
+            "Monitor blood pressure monthly"
+        ],
+        "high": [
+            "Consult with a healthcare provider",
+            "DASH diet (Dietary Approaches to Stop Hypertension)",
+            "Limit alcohol consumption",
+            "Stress management techniques"
+        ]
+    }
+    # Add more risk factors and their recommendations
+}
+_RECOMMENDATION_JSON = {
+    factor: orjson.dumps({"risk_factor": factor, "recommendations": recs})
+    for factor, recs in _RECOMMENDATIONS.items()
+}
+
+_CATEGORY_WEIGHTS = {
+    "cardiovascular": 0.4,
+    "metabolic": 0.3,
+    # Add more categories with their weights if needed
+}
+_SUM_WEIGHTS = sum(_CATEGORY_WEIGHTS.values())
+
+# Threshold tables: category lookup is one bisect over a sorted tuple rather
+# than a chain of branch-predicted comparisons, and adding a band means
+# editing the table, not the code
+_BMI_CUTS = (18.5, 25.0, 30.0)
+_BMI_LABELS = ("Underweight", "Normal weight", "Overweight", "Obesity")
+
+_RISK_LEVELS = ("Low", "Moderate", "High")
+_CARDIO_RISK_CUTS = (2, 5)  # score <= 2 Low, <= 5 Moderate, above High
+_METABOLIC_RISK_CUTS = (1, 4)
+
+# Matched risk factors travel through scoring as lightweight namedtuples;
+# they only become dicts when the response payload is materialized
+_RF = namedtuple("_RF", "factor value recommendation")
 
 # Helper functions for risk assessment calculations
 def calculate_bmi(weight: float, height: float) -> float:
@@ -114,14 +244,7 @@ def calculate_bmi(weight: float, height: float) -> float:
 
 def get_bmi_category(bmi: float) -> str:
     """Determine BMI category"""
-    if bmi < 18.5:
-        return "Underweight"
-    elif bmi < 25:
-        return "Normal weight"
-    elif bmi < 30:
-        return "Overweight"
-    else:
-        return "Obesity"
+    return _BMI_LABELS[bisect.bisect_right(_BMI_CUTS, bmi)]
 
 def calculate_cardiovascular_risk(data: RiskAssessmentRequest) -> Dict[str, Any]:
     """Calculate cardiovascular risk based on input parameters"""
@@ -131,82 +254,132 @@ def calculate_cardiovascular_risk(data: RiskAssessmentRequest) -> Dict[str, Any]
     # Age factor
     if data.age > 55:
         risk_score += 2
-        risk_factors.append({
-            "factor": "Age",
-            "value": data.age,
-            "recommendation": "Age is a non-modifiable risk factor. Focus on other health parameters."
-        })
+        risk_factors.append(_RF("Age", data.age, _REC_AGE))
     
     # Blood pressure factor
     if data.systolic_bp and data.systolic_bp > 140:
         risk_score += 3
-        risk_factors.append({
-            "factor": "High Blood Pressure",
-            "value": data.systolic_bp,
-            "recommendation": "Consider dietary changes and regular monitoring."
-        })
+        risk_factors.append(_RF("High Blood Pressure", data.systolic_bp, _REC_HBP))
     
     # Cholesterol factors
     if data.cholesterol and data.cholesterol > 200:
         risk_score += 2
-        risk_factors.append({
-            "factor": "High Total Cholesterol",
-            "value": data.cholesterol,
-            "recommendation": "Limit saturated fats and increase physical activity."
-        })
+        risk_factors.append(_RF("High Total Cholesterol", data.cholesterol, _REC_CHOL))
     
     # Smoking factor
     if data.smoking:
         risk_score += 4
-        risk_factors.append({
-            "factor": "Smoking",
-            "value": 1.0,  # Converted to float for type consistency
-            "recommendation": "Quitting smoking significantly reduces cardiovascular risk."
-        })
+        # Value converted to float for type consistency
+        risk_factors.append(_RF("Smoking", 1.0, _REC_SMOKING))
     
     return {
         "risk_score": risk_score,
-        "risk_level": "High" if risk_score > 5 else "Moderate" if risk_score > 2 else "Low",
+        "risk_level": _RISK_LEVELS[bisect.bisect_left(_CARDIO_RISK_CUTS, risk_score)],
         "risk_factors": risk_factors
     }
 
-def calculate_metabolic_risk(data: RiskAssessmentRequest) -> Dict[str, Any]:
-    """Calculate metabolic risk based on input parameters"""
+def calculate_metabolic_risk(data: RiskAssessmentRequest, bmi: Optional[float] = None) -> Dict[str, Any]:
+    """Calculate metabolic risk based on input parameters.
+
+    ``bmi`` lets callers that already computed it skip the recalculation.
+    """
     risk_score = 0
     risk_factors = []
-    
+
     # BMI factor
-    bmi = calculate_bmi(data.weight, data.height)
+    if bmi is None:
+        bmi = calculate_bmi(data.weight, data.height)
     if bmi > 30:
         risk_score += 3
-        risk_factors.append({
-            "factor": "Obesity", 
-            "value": float(bmi),  # Ensure it's a float
-            "recommendation": "Focus on weight management through diet and exercise."
-        })
+        risk_factors.append(_RF("Obesity", float(bmi), _REC_OBESITY))
     elif bmi > 25:
         risk_score += 1
-        risk_factors.append({
-            "factor": "Overweight",
-            "value": float(bmi),  # Ensure it's a float
-            "recommendation": "Modest weight loss can improve metabolic health."
-        })
+        risk_factors.append(_RF("Overweight", float(bmi), _REC_OVERWEIGHT))
     
     # Glucose factor
     if data.fasting_glucose and data.fasting_glucose > 100:
         risk_score += 2
-        risk_factors.append({
-            "factor": "Elevated Fasting Glucose",
-            "value": float(data.fasting_glucose),  # Ensure it's a float
-            "recommendation": "Monitor blood sugar and consider dietary adjustments."
-        })
+        risk_factors.append(_RF("Elevated Fasting Glucose", float(data.fasting_glucose), _REC_GLUCOSE))
     
     return {
         "risk_score": risk_score,
-        "risk_level": "High" if risk_score > 4 else "Moderate" if risk_score > 1 else "Low",
+        "risk_level": _RISK_LEVELS[bisect.bisect_left(_METABOLIC_RISK_CUTS, risk_score)],
         "risk_factors": risk_factors
     }
 
+def _assess(data: RiskAssessmentRequest) -> Dict[str, Any]:
+    """Run the full assessment for one profile and return the response dict.
+
+    Shared scoring kernel for the single and batch endpoints; keeping it
+    narrow means a vectorized implementation can replace it in one place
+    if cohort sizes ever warrant it.
+    """
+    # Calculate BMI
+    bmi = calculate_bmi(data.weight, data.height)
+    bmi_category = get_bmi_category(bmi)
+
+    # Calculate different risk categories
+    cardiovascular_risk = calculate_cardiovascular_risk(data)
+    metabolic_risk = calculate_metabolic_risk(data, bmi)
+
+    # Calculate overall risk score (weighted average of category risks)
+    category_scores = {
+        "cardiovascular": cardiovascular_risk["risk_score"],
+        "metabolic": metabolic_risk["risk_score"],
+        # Add more category scores if needed
+    }
+
+    if _SUM_WEIGHTS > 0:  # Prevent division by zero
+        overall_score = sum(
+            category_scores[cat] * weight
+            for cat, weight in _CATEGORY_WEIGHTS.items()
+        ) / _SUM_WEIGHTS
+    else:
+        overall_score = 0
+
+    # Scale to 0-100
+    normalized_score = min(100, max(0, overall_score * 10))
+
+    # Generate recommendations based on risk factors
+    all_risk_factors = cardiovascular_risk["risk_factors"] + metabolic_risk["risk_factors"]
+    recommendations = [factor.recommendation for factor in all_risk_factors]
+
+    # Add general recommendations based on the profile
+    if data.exercise_minutes_per_week is None or data.exercise_minutes_per_week < 150:
+        recommendations.append(_REC_EXERCISE)
+
+    if not recommendations:  # If no specific recommendations
+        recommendations.append(_REC_HEALTHY)
+        recommendations.append(_REC_CHECKUP)
+
+
+    # Calculate health age (simplified algorithm)
+    health_age = data.age
+    if bmi > 30:
+        health_age += 5
+    if data.smoking:
+        health_age += 7
+    if data.exercise_minutes_per_week and data.exercise_minutes_per_week > 150:
+        health_age -= 3
+
+    cardiovascular_risk["risk_factors"] = [factor._asdict() for factor in cardiovascular_risk["risk_factors"]]
+    metabolic_risk["risk_factors"] = [factor._asdict() for factor in metabolic_risk["risk_factors"]]
+
+    return {
+        "bmi": bmi,
+        "bmi_category": bmi_category,
+        "health_age": health_age,
+        "overall_risk_score": float(normalized_score),  # Ensure it's a float
+        "risk_categories": {
+            "cardiovascular": cardiovascular_risk,
+            "metabolic": metabolic_risk,
+            # Add more categories if needed
+        },
+        # Order-preserving dedup: one hash pass, stable output
+        "recommendations": list(dict.fromkeys(recommendations)),
+        "next_steps": _NEXT_STEPS
+    }
+
 # Endpoints
 @router.post("/assess", response_model=RiskAssessmentResponse)
 async def assess_health_risks(data: RiskAssessmentRequest = Body(...)):
@@ -216,178 +389,68 @@ async def assess_health_risks(data: RiskAssessmentRequest = Body(...)):
     """
     try:
         logger.info(f"Processing risk assessment request for age: {data.age}, gender: {data.gender}")
-        
-        # Calculate BMI
-        bmi = calculate_bmi(data.weight, data.height)
-        bmi_category = get_bmi_category(bmi)
-        
-        # Calculate different risk categories
-        cardiovascular_risk = calculate_cardiovascular_risk(data)
-        metabolic_risk = calculate_metabolic_risk(data)
-        
-        # Calculate overall risk score (weighted average of category risks)
-        category_weights = {
-            "cardiovascular": 0.4,
-            "metabolic": 0.3,
-            # Add more categories with their weights if needed
-        }
-        
-        category_scores = {
-            "cardiovascular": cardiovascular_risk["risk_score"],
-            "metabolic": metabolic_risk["risk_score"],
-            # Add more category scores if needed
-        }
-        
-        sum_weights = sum(category_weights.values())
-        if sum_weights > 0:  # Prevent division by zero
-            overall_score = sum(
-                category_scores[cat] * weight 
-                for cat, weight in category_weights.items()
-            ) / sum_weights
+
+        result = _assess(data)
+        if TRUSTED_INTERNAL:
+            response = RiskAssessmentResponse.model_construct(**result)
         else:
-            overall_score = 0
-        
-        # Scale to 0-100
-        normalized_score = min(100, max(0, overall_score * 10))
-        
-        # Generate recommendations based on risk factors
-        all_risk_factors = cardiovascular_risk["risk_factors"] + metabolic_risk["risk_factors"]
-        recommendations = [factor["recommendation"] for factor in all_risk_factors]
-        
-        # Add general recommendations based on the profile
-        if data.exercise_minutes_per_week is None or data.exercise_minutes_per_week < 150:
-            recommendations.append("Aim for at least 150 minutes of moderate exercise per week.")
-        
-        if not recommendations:  # If no specific recommendations
-            recommendations.append("Maintain your current healthy lifestyle.")
-            recommendations.append("Regular check-ups are recommended.")
-        
-        # Next steps
-        next_steps = [
-            "Consult with a healthcare provider to discuss these results",
-            "Set up regular health check-ups",
-            "Track your progress using our health tracker"
-        ]
-        
-        # Calculate health age (simplified algorithm)
-        health_age = data.age
-        if bmi > 30:
-            health_age += 5
-        if data.smoking:
-            health_age += 7
-        if data.exercise_minutes_per_week and data.exercise_minutes_per_week > 150:
-            health_age -= 3
-        
-        # Compile the response
-        response = RiskAssessmentResponse(
-            bmi=bmi,
-            bmi_category=bmi_category,
-            health_age=health_age,
-            overall_risk_score=float(normalized_score),  # Ensure it's a float
-            risk_categories={
-                "cardiovascular": cardiovascular_risk,
-                "metabolic": metabolic_risk,
-                # Add more categories if needed
-            },
-            recommendations=list(set(recommendations)),  # Remove duplicates
-            next_steps=next_steps
-        )
-        
-        logger.info(f"Risk assessment completed successfully, overall score: {normalized_score}")
+            response = RiskAssessmentResponse(**result)
+
+        logger.info(f"Risk assessment completed successfully, overall score: {result['overall_risk_score']}")
         return response
-        
+
     except Exception as e:
         logger.error(f"Error in risk assessment: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing risk assessment: {str(e)}")
 
+@router.post("/assess-batch")
+async def assess_health_risks_batch(payload: list = Body(...)):
+    """
+    Assess health risks for a cohort of profiles in a single request.
+    Returns one assessment per profile, in input order.
+    """
+    try:
+        # Validate the whole cohort in a single pydantic-core pass
+        batch = _REQ_LIST_ADAPTER.validate_python(payload)
+        logger.info(f"Processing batch risk assessment for {len(batch)} profiles")
+
+        results = [_assess(data) for data in batch]
+
+        return {"count": len(results), "results": results}
+
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    except Exception as e:
+        logger.error(f"Error in batch risk assessment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing batch risk assessment: {str(e)}")
+
 @router.get("/factors")
 async def get_risk_factors():
     """Get a list of all risk factors that can be assessed."""
-    return {
-        "risk_factors": [
-            {
-                "id": "bmi",
-                "name": "Body Mass Index",
-                "description": "A measure of body fat based on height and weight",
-                "input_parameters": ["height", "weight"]
-            },
-            {
-                "id": "blood_pressure",
-                "name": "Blood Pressure",
-                "description": "The pressure of blood against the walls of arteries",
-                "input_parameters": ["systolic_bp", "diastolic_bp"]
-            },
-            {
-                "id": "cholesterol",
-                "name": "Cholesterol Levels",
-                "description": "Levels of lipids in the blood",
-                "input_parameters": ["cholesterol", "hdl", "ldl", "triglycerides"]
-            },
-            # Add more risk factors
-        ]
-    }
+    return Response(content=_FACTORS_JSON, media_type="application/json")
 
 @router.get("/recommendations/{risk_factor}")
 async def get_recommendations_for_risk_factor(risk_factor: str):
     """Get detailed recommendations for a specific risk factor."""
-    recommendations = {
-        "bmi": {
-            "underweight": [
-                "Consult with a nutritionist for a healthy weight gain plan",
-                "Focus on nutrient-dense foods",
-                "Include strength training in your exercise routine"
-            ],
-            "normal": [
-                "Maintain your current healthy habits",
-                "Regular exercise and balanced diet"
-            ],
-            "overweight": [
-                "Aim for 150-300 minutes of moderate exercise per week",
-                "Focus on portion control",
-                "Increase intake of fruits, vegetables and whole grains"
-            ],
-            "obesity": [  
-                "Consult with healthcare provider for a personalized weight management plan",
-                "Set realistic weight loss goals (1-2 pounds per week)",
-                "Consider keeping a food and activity journal"
-            ]
-        },
-        "blood_pressure": {
-            "normal": [
-                "Maintain healthy lifestyle habits",
-                "Check blood pressure annually"
-            ],
-            "elevated": [
-                "Reduce sodium intake",
-                "Regular physical activity",
-                "Monitor blood pressure monthly"
-            ],
-            "high": [
-                "Consult with a healthcare provider",
-                "DASH diet (Dietary Approaches to Stop Hypertension)",
-                "Limit alcohol consumption",
-                "Stress management techniques"
-            ]
-        }
-        # Add more risk factors and their recommendations
-    }
-    
-    if risk_factor not in recommendations:
+    body = _RECOMMENDATION_JSON.get(risk_factor)
+    if body is None:
         raise HTTPException(status_code=404, detail=f"Risk factor '{risk_factor}' not found")
-    
-    return {"risk_factor": risk_factor, "recommendations": recommendations[risk_factor]}
+
+    return Response(content=body, media_type="application/json")
 
 @router.post("/save-assessment")
 async def save_assessment(assessment_data: Dict[str, Any] = Body(...)):
     """Save a completed risk assessment result."""
     # In a real application, this would save to a database
     # Here we'll just acknowledge the save
-    
-    # Generate a unique ID for this assessment
-    assessment_id = f"assessment_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
+
+    # One clock read per save: id and timestamp derive from the same instant,
+    # and the nanosecond suffix keeps ids unique within a second
+    now = datetime.now()
+    assessment_id = f"assessment_{now.strftime('%Y%m%d%H%M%S')}_{time.time_ns() % 1_000_000_000:09d}"
+
     return {
         "message": "Assessment saved successfully",
         "assessment_id": assessment_id,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now.isoformat()
     }
@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
+from collections import Counter, defaultdict
+from heapq import nlargest
+from operator import itemgetter
+import bisect
 import logging
+import orjson
+import re
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Search results are assembled server-side from the static corpus, so the
+# response models skip Pydantic validation via model_construct. Flip to
+# False to re-enable full response validation during development.
+TRUSTED_INTERNAL = True
+
 # Models
 class SearchResult(BaseModel):
     id: str
@@ -67,6 +78,63 @@ search_content = [
     }
 ]
 
+# Structure-of-arrays view over the corpus: one tuple per field, indexed by
+# row, plus an id -> row map. The scan touches parallel tuples instead of
+# per-item dict lookups; search_content itself stays the authoring format.
+_IDS = tuple(item["id"] for item in search_content)
+_TITLES = tuple(item["title"] for item in search_content)
+_SUMMARIES = tuple(item["summary"] for item in search_content)
+_CONTENTS = tuple(item["content"] for item in search_content)
+_CONTENT_TYPES = tuple(item["content_type"] for item in search_content)
+_URLS = tuple(item["url"] for item in search_content)
+_CATEGORIES = tuple(tuple(item.get("categories", [])) for item in search_content)
+_ID_INDEX = {doc_id: row for row, doc_id in enumerate(_IDS)}
+
+# Precomputed casefolded fields per row, so no request re-normalizes the
+# static corpus; casefold() is the full Unicode folding (a no-op for
+# Persian, but correct for any Latin content that lands in the corpus).
+# Tags keep their original form alongside for highlights
+_TITLE_LC = tuple(title.casefold() for title in _TITLES)
+_SUMMARY_LC = tuple(summary.casefold() for summary in _SUMMARIES)
+_CONTENT_LC = tuple(content.casefold() for content in _CONTENTS)
+_TAGS_LC = tuple(
+    [(tag, tag.casefold()) for tag in item.get("tags", [])]
+    for item in search_content
+)
+
+# Inverted index over title/summary/content/tags: every substring of every
+# token (three characters and up) posts to the docs containing it, so a query
+# token like "اند" also reaches docs where it only occurs mid-word
+# ("اندازه‌گیری"). Scoring stays substring-based, so the candidate set must be
+# a superset of the substring matches — prefixes alone are not, because a
+# mid-word match has no prefix posting. A \w+ query token can never span the
+# non-word characters between corpus tokens, so per-token substring postings
+# intersected cover every doc the whole query can match; the scoring pass
+# below still decides membership. Short tokens fall back to the full scan.
+_token_re = re.compile(r"\w+", re.UNICODE)
+
+def _tokenize(text: str) -> List[str]:
+    return _token_re.findall(text.casefold())
+
+_INVERTED: Dict[str, set] = defaultdict(set)
+for _row, _item in enumerate(search_content):
+    for _field in (
+        _item["title"], _item["summary"], _item["content"], " ".join(_item.get("tags", []))
+    ):
+        for _tok in _tokenize(_field):
+            for _start in range(len(_tok) - 2):
+                for _end in range(_start + 3, len(_tok) + 1):
+                    _INVERTED[_tok[_start:_end]].add(_row)
+
+# Filter sets: content type / category -> row sets, intersected against the
+# candidate set instead of being re-checked per item
+_BY_TYPE: Dict[str, set] = defaultdict(set)
+_BY_CAT: Dict[str, set] = defaultdict(set)
+for _row, _item in enumerate(search_content):
+    _BY_TYPE[_item["content_type"]].add(_row)
+    for _cat in _item.get("categories", []):
+        _BY_CAT[_cat].add(_row)
+
 # Simple search function that checks for keyword matches
 def search_content_by_query(query: str, content_type: Optional[str] = None, category: Optional[str] = None):
     """
@@ -74,100 +142,121 @@ def search_content_by_query(query: str, content_type: Optional[str] = None, cate
     Returns a list of matching items with relevance scores.
     """
     results = []
-    query = query.lower()
-    
-    for item in search_content:
-        # Skip if content type filter is applied and doesn't match
-        if content_type and item["content_type"] != content_type:
-            continue
-            
-        # Skip if category filter is applied and doesn't match
-        if category and category not in item.get("categories", []):
-            continue
-        
-        # Calculate a simple relevance score
+    query = query.casefold()
+
+    # Narrow the scan to index candidates when every query token is long
+    # enough to be posted — the path depends only on the query, not on what
+    # the corpus happens to contain; the filter sets are folded into the same
+    # candidate intersection. A missing token means no doc can match.
+    tokens = _tokenize(query)
+    candidate_rows = None
+    if tokens and all(len(t) >= 3 for t in tokens):
+        candidate_rows = set.intersection(*(_INVERTED.get(t, set()) for t in tokens))
+        if content_type:
+            candidate_rows &= _BY_TYPE.get(content_type, set())
+        if category:
+            candidate_rows &= _BY_CAT.get(category, set())
+
+    for row in range(len(_IDS)):
+        if candidate_rows is not None:
+            if row not in candidate_rows:
+                continue
+        else:
+            # Skip if content type filter is applied and doesn't match
+            if content_type and _CONTENT_TYPES[row] != content_type:
+                continue
+
+            # Skip if category filter is applied and doesn't match
+            if category and category not in _CATEGORIES[row]:
+                continue
+
+        # Calculate a simple relevance score over the precomputed lowercase
+        # fields — no per-request lowercasing of the corpus
         relevance_score = 0
         highlights = []
-        
+
         # Check title for query match
-        if query in item["title"].lower():
+        if query in _TITLE_LC[row]:
             relevance_score += 10
-            highlights.append(item["title"])
-            
+            highlights.append(_TITLES[row])
+
         # Check summary for query match
-        if query in item["summary"].lower():
+        if query in _SUMMARY_LC[row]:
             relevance_score += 5
-            highlights.append(item["summary"])
-            
+            highlights.append(_SUMMARIES[row])
+
         # Check content for query match
-        if query in item["content"].lower():
+        content_lower = _CONTENT_LC[row]
+        match_idx = content_lower.find(query)
+        if match_idx != -1:
             relevance_score += 3
             # Extract a snippet around the match
-            content_lower = item["content"].lower()
-            start_idx = max(0, content_lower.find(query) - 20)
-            end_idx = min(len(item["content"]), content_lower.find(query) + len(query) + 20)
-            snippet = f"...{item['content'][start_idx:end_idx]}..."
+            content = _CONTENTS[row]
+            start_idx = max(0, match_idx - 20)
+            end_idx = min(len(content), match_idx + len(query) + 20)
+            snippet = f"...{content[start_idx:end_idx]}..."
             highlights.append(snippet)
-            
+
         # Check tags for query match
-        for tag in item.get("tags", []):
-            if query in tag.lower():
+        for tag, tag_lower in _TAGS_LC[row]:
+            if query in tag_lower:
                 relevance_score += 3
                 highlights.append(f"Tag: {tag}")
-                
+
         # If we found any matches, add to results
         if relevance_score > 0:
             results.append({
-                "id": item["id"],
-                "title": item["title"],
-                "summary": item["summary"],
-                "content_type": item["content_type"],
-                "url": item["url"],
+                "id": _IDS[row],
+                "title": _TITLES[row],
+                "summary": _SUMMARIES[row],
+                "content_type": _CONTENT_TYPES[row],
+                "url": _URLS[row],
                 "relevance_score": relevance_score,
                 "highlights": highlights
             })
     
-    # Sort by relevance score (highest first)
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
+    # Results come back in corpus order; ranking is the caller's concern so
+    # it can select top-K without paying for a full sort
     return results
 
+# Keyword-triggered suggestions, first matching trigger wins; the general
+# suggestions are appended to every response
+_SUGGESTION_TRIGGERS = (
+    ("فشار خون", ["کاهش فشار خون", "داروهای فشار خون", "رژیم غذایی فشار خون"]),
+    ("سرطان", ["غربالگری سرطان", "پیشگیری از سرطان", "علائم هشدار سرطان"]),
+    ("قلب", ["سلامت قلب", "بیماری های قلبی", "ورزش برای قلب"]),
+)
+_GENERAL_SUGGESTIONS = ["پیشگیری", "سبک زندگی سالم", "تغذیه سالم"]
+
 def get_suggested_queries(query: str) -> List[str]:
     """Generate suggested related queries based on the original query."""
     suggestions = []
-    
-    # Add some hardcoded suggestions based on common keywords
-    if "فشار خون" in query:
-        suggestions.extend(["کاهش فشار خون", "داروهای فشار خون", "رژیم غذایی فشار خون"])
-    elif "سرطان" in query:
-        suggestions.extend(["غربالگری سرطان", "پیشگیری از سرطان", "علائم هشدار سرطان"])
-    elif "قلب" in query:
-        suggestions.extend(["سلامت قلب", "بیماری های قلبی", "ورزش برای قلب"])
-    
+
+    for trigger, triggered in _SUGGESTION_TRIGGERS:
+        if trigger in query:
+            suggestions.extend(triggered)
+            break
+
     # Add some general health suggestions
-    suggestions.extend(["پیشگیری", "سبک زندگی سالم", "تغذیه سالم"])
-    
-    # Return only unique suggestions (up to 5)
-    unique_suggestions = list(set(suggestions))[:5]
-    return unique_suggestions
+    suggestions.extend(_GENERAL_SUGGESTIONS)
+
+    # Return only unique suggestions (up to 5), keeping trigger order so the
+    # same query always yields the same list
+    return list(dict.fromkeys(suggestions))[:5]
+
+# Category universe precomputed once, so per-request counting is a single
+# Counter pass instead of a linear corpus scan per result
+_ALL_CATEGORIES = tuple(dict.fromkeys(
+    category for categories in _CATEGORIES for category in categories
+))
 
 def count_results_by_category(results: List[Dict[str, Any]]) -> Dict[str, int]:
     """Count the number of search results by category."""
-    category_counts = {}
-    
-    for item in search_content:
-        for category in item.get("categories", []):
-            if category not in category_counts:
-                category_counts[category] = 0
-    
+    counts = Counter()
     for result in results:
-        item_id = result["id"]
-        original_item = next((item for item in search_content if item["id"] == item_id), None)
-        if original_item:
-            for category in original_item.get("categories", []):
-                if category in category_counts:
-                    category_counts[category] += 1
-    
-    return category_counts
+        counts.update(_CATEGORIES[_ID_INDEX[result["id"]]])
+
+    return {category: counts.get(category, 0) for category in _ALL_CATEGORIES}
 
 @router.get("/", response_model=SearchResponse)
 async def search(
@@ -195,25 +284,33 @@ async def search(
     # Generate suggested queries
     suggested_queries = get_suggested_queries(q)
     
-    # Apply limit to results
-    paginated_results = results[:limit]
-    
-    # Build the response
-    response = SearchResponse(
-        query=q,
-        results=paginated_results,
-        total_results=len(results),
-        categories=category_counts,
-        suggested_queries=suggested_queries
-    )
+    # Top-K selection: O(R log K) instead of sorting every match, with the
+    # same stable highest-first ordering the full sort produced
+    paginated_results = nlargest(limit, results, key=itemgetter("relevance_score"))
     
+    # Build the response (construct fast-path for trusted internal data)
+    if TRUSTED_INTERNAL:
+        response = SearchResponse.model_construct(
+            query=q,
+            results=[SearchResult.model_construct(**result) for result in paginated_results],
+            total_results=len(results),
+            categories=category_counts,
+            suggested_queries=suggested_queries
+        )
+    else:
+        response = SearchResponse(
+            query=q,
+            results=paginated_results,
+            total_results=len(results),
+            categories=category_counts,
+            suggested_queries=suggested_queries
+        )
+
     return response
 
-@router.get("/popular")
-async def get_popular_searches():
-    """Get a list of popular search terms."""
-    # In a real application, this would be based on analytics data
-    popular_searches = [
+# Popular terms are static analytics output; serialize once at import
+_POPULAR_SEARCHES_JSON = orjson.dumps({
+    "popular_searches": [
         "فشار خون",
         "دیابت",
         "کلسترول",
@@ -225,8 +322,40 @@ async def get_popular_searches():
         "کاهش وزن",
         "استرس"
     ]
-    
-    return {"popular_searches": popular_searches}
+})
+
+@router.get("/popular")
+async def get_popular_searches():
+    """Get a list of popular search terms."""
+    return Response(content=_POPULAR_SEARCHES_JSON, media_type="application/json")
+
+# In a real application, these would come from a database or search engine.
+# Held at module scope (not rebuilt per keystroke) and kept sorted by the
+# lowercase form so prefix lookups become a bisect range scan.
+_AUTOCOMPLETE_TERMS = [
+    "فشار خون بالا",
+    "فشار خون پایین",
+    "فشار خون در بارداری",
+    "سرطان سینه",
+    "سرطان روده بزرگ",
+    "سرطان پوست",
+    "دیابت نوع ۱",
+    "دیابت نوع ۲",
+    "دیابت بارداری",
+    "کلسترول بالا",
+    "کلسترول خوب و بد",
+    "کمبود ویتامین دی",
+    "ویتامین دی در بارداری",
+    "خواب کافی",
+    "اختلالات خواب",
+    "کاهش وزن سالم",
+    "کاهش وزن سریع",
+    "استرس و اضطراب",
+    "مدیریت استرس"
+]
+
+_AUTOCOMPLETE_SORTED = sorted((term.casefold(), term) for term in _AUTOCOMPLETE_TERMS)
+_AUTOCOMPLETE_LOWERS = [lower for lower, _ in _AUTOCOMPLETE_SORTED]
 
 @router.get("/autocomplete")
 async def get_search_autocomplete(
@@ -238,34 +367,15 @@ async def get_search_autocomplete(
     """
     if not q:
         return {"suggestions": []}
-    
-    # In a real application, these would come from a database or search engine
-    all_terms = [
-        "فشار خون بالا",
-        "فشار خون پایین",
-        "فشار خون در بارداری",
-        "سرطان سینه",
-        "سرطان روده بزرگ",
-        "سرطان پوست",
-        "دیابت نوع ۱",
-        "دیابت نوع ۲",
-        "دیابت بارداری",
-        "کلسترول بالا",
-        "کلسترول خوب و بد",
-        "کمبود ویتامین دی",
-        "ویتامین دی در بارداری",
-        "خواب کافی",
-        "اختلالات خواب",
-        "کاهش وزن سالم",
-        "کاهش وزن سریع",
-        "استرس و اضطراب",
-        "مدیریت استرس"
-    ]
-    
-    # Filter terms that start with the query (case-insensitive)
-    q_lower = q.lower()
-    matching_terms = [term for term in all_terms if term.lower().startswith(q_lower)]
-    
+
+    # Locate the prefix range in the sorted terms with two bisects instead of
+    # lowercasing and filtering the full list per keystroke. "￿" sorts
+    # after any continuation of the prefix, bounding the range.
+    q_lower = q.casefold()
+    lo = bisect.bisect_left(_AUTOCOMPLETE_LOWERS, q_lower)
+    hi = bisect.bisect_left(_AUTOCOMPLETE_LOWERS, q_lower + "￿")
+    matching_terms = [term for _, term in _AUTOCOMPLETE_SORTED[lo:hi]]
+
     # Sort by length (shorter first) and limit to 10 suggestions
     matching_terms.sort(key=len)
     return {"suggestions": matching_terms[:10]}
\ No newline at end of file
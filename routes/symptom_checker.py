@@ -1,15 +1,19 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any, Union
-import json
+import hashlib
+import orjson
 import os
 import time
-import traceback
 from dotenv import load_dotenv
 import logging
-from openai import OpenAI
+from functools import lru_cache
+from openai import AsyncOpenAI
 import httpx  # Import httpx
 
+from utils.helpers import log_api_request
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -17,49 +21,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
 # Initialize router
 router = APIRouter(
     prefix="/api/symptom-checker",  # Add prefix to match API path
     tags=["Symptom Checker"],
     responses={404: {"description": "Not found"}},
+    default_response_class=ORJSONResponse,
 )
 
-# Check for OpenAI API key
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    logger.warning("OpenAI API key not found. Please set the OPENAI_API_KEY environment variable.")
-
-# Configure Proxies (if needed)
-proxy_url = os.getenv("PROXY_URL")
-proxies = None
-if proxy_url:
-    proxies = {
-        "http": proxy_url,
-        "https": proxy_url,
-    }
-    logger.info(f"Using proxy: {proxy_url}")
-else:
-    logger.info("No proxy configured.")
-
-# Initialize httpx client with proxy settings
-timeout = 30.0
-transport = httpx.HTTPTransport()
-http_client = httpx.Client(transport=transport, timeout=timeout)
-
-# Initialize OpenAI client, passing the httpx client
-client = OpenAI(api_key=openai_api_key, http_client=http_client)
-
-# Simple helper functions
-def sanitize_input(input_data):
-    """Simple sanitization stub"""
-    return input_data
+# Client construction — dotenv load, env reads and the connection pool — is
+# deferred to first use and cached, so importing this module (or starting a
+# worker that only serves /test) costs nothing.
+
+@lru_cache(maxsize=1)
+def _get_api_key():
+    """Load the environment once and return the OpenAI API key, if any."""
+    load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.warning("OpenAI API key not found. Please set the OPENAI_API_KEY environment variable.")
+    return api_key
+
+@lru_cache(maxsize=1)
+def _build_http_client() -> httpx.AsyncClient:
+    """Build the shared async httpx client.
+
+    The async transport keeps the event loop free while a completion is in
+    flight (instead of serializing every request on one blocked thread);
+    keep-alive pooling with a 30s expiry amortizes the TCP/TLS handshake
+    across calls and keeps warm connections around between bursts; the
+    granular timeout fails fast on connect/pool exhaustion instead of eating
+    the whole 30s read budget. (http2=True would multiplex streams over one
+    TLS connection, but needs the httpx[http2] extra.)
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=30.0
+        ),
+        timeout=httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
+    )
+
+@lru_cache(maxsize=1)
+def get_client() -> AsyncOpenAI:
+    """Build the OpenAI client on first use, reusing it afterwards."""
+    proxy_url = os.getenv("PROXY_URL")
+    if proxy_url:
+        logger.info(f"Using proxy: {proxy_url}")
+    else:
+        logger.info("No proxy configured.")
+    return AsyncOpenAI(api_key=_get_api_key(), http_client=_build_http_client())
 
-def log_api_request(endpoint, status_code, processing_time):
-    """Simple logging stub"""
-    logger.info(f"API Request: {endpoint}, Status: {status_code}, Processing Time: {processing_time:.4f}s")
+@router.on_event("shutdown")
+async def close_http_client():
+    """Release the pooled connections when the app shuts down."""
+    if _build_http_client.cache_info().currsize:
+        await _build_http_client().aclose()
 
 # Models
 class SymptomRequest(BaseModel):
@@ -80,29 +98,21 @@ class SymptomResponse(BaseModel):
     severity_level: str = Field(..., description="Severity level (Low/Medium/High)")
     seek_medical_attention: bool = Field(..., description="Whether medical attention should be sought")
 
+# Age buckets as a precomputed table so logging never formats a fresh
+# string per request; ages 110+ share the last bucket
+_AGE_BUCKETS = ("child", "10s", "20s", "30s", "40s", "50s", "60s", "70s", "80s", "90s", "100s")
+
 # Helper function to log symptom checks
 async def log_symptom_check(age: int, gender: str):
     """Log symptom check details without storing personal information."""
-    age_group = f"{age//10*10}s" if age >= 10 else "child"
-    logger.info(f"Symptom check performed: Age group: {age_group}, Gender: {gender}")
-
-def create_symptom_prompt(data: SymptomRequest) -> str:
-    """Create a detailed prompt from the symptom data."""
-    prompt = f"""
-    Patient Information:
-    - Age: {data.age}
-    - Gender: {data.gender}
-    - Symptoms: {', '.join(data.symptoms)}
-    """
+    age_group = _AGE_BUCKETS[min(age // 10, 10)]
+    logger.info("Symptom check performed: Age group: %s, Gender: %s", age_group, gender)
 
-    if data.medical_history and len(data.medical_history) > 0:
-        prompt += f"- Medical History: {', '.join(data.medical_history)}\n"
-    if data.allergies and len(data.allergies) > 0:
-        prompt += f"- Allergies: {', '.join(data.allergies)}\n"
-    if data.medications and len(data.medications) > 0:
-        prompt += f"- Current Medications: {', '.join(data.medications)}\n"
+# The constant prompt segments and the system message are built once at
+# import; create_symptom_prompt only formats the per-patient lines and joins.
+_PROMPT_HEADER = "\n    Patient Information:\n"
 
-    prompt += """
+_PROMPT_FOOTER = """
     Based on this information, provide:
     1. Possible conditions or diagnoses with probability estimates
     2. General recommendations for the patient
@@ -120,13 +130,48 @@ def create_symptom_prompt(data: SymptomRequest) -> str:
     }
     """
 
-    return prompt
+_SYSTEM_MSG = "You are a helpful medical assistant. Analyze the symptoms provided and suggest possible conditions, recommendations, and whether medical attention should be sought. Format your response as JSON with keys 'possible_conditions' (array of objects with 'condition' and 'probability' fields), 'recommendations' (array of strings), 'severity_level' (string), and 'seek_medical_attention' (boolean)."
+
+def _make_basic_prompt(age: int, gender: str, symptoms: List[str]) -> str:
+    """One-shot prompt for the dominant age/gender/symptoms-only shape."""
+    return (
+        f"{_PROMPT_HEADER}    - Age: {age}\n    - Gender: {gender}\n"
+        f"    - Symptoms: {', '.join(symptoms)}\n    {_PROMPT_FOOTER}"
+    )
+
+def create_symptom_prompt(data: SymptomRequest) -> str:
+    """Create a detailed prompt from the symptom data."""
+    # Most requests carry no history/allergies/medications; build those in
+    # a single f-string instead of walking the optional branches
+    if not (data.medical_history or data.allergies or data.medications):
+        return _make_basic_prompt(data.age, data.gender, data.symptoms)
+
+    parts = [
+        _PROMPT_HEADER,
+        f"    - Age: {data.age}\n    - Gender: {data.gender}\n    - Symptoms: {', '.join(data.symptoms)}\n    ",
+    ]
+
+    if data.medical_history:
+        parts.append(f"- Medical History: {', '.join(data.medical_history)}\n")
+    if data.allergies:
+        parts.append(f"- Allergies: {', '.join(data.allergies)}\n")
+    if data.medications:
+        parts.append(f"- Current Medications: {', '.join(data.medications)}\n")
+
+    parts.append(_PROMPT_FOOTER)
+    return "".join(parts)
+
+# Default fragments for the failure paths live at module scope; the helpers
+# hand out dict() copies of the templates so callers stay free to mutate
+_CONSULT_RECOMMENDATION = "Please consult with a healthcare professional."
+_UNKNOWN_COND = {"condition": "Unknown", "probability": "Unknown"}
+_FALLBACK_COND = {"condition": "Could not determine", "probability": "Unknown"}
 
 def create_fallback_response() -> dict:
     """Create a fallback response when parsing fails."""
     return {
-        "possible_conditions": [{"condition": "Could not determine", "probability": "Unknown"}],
-        "recommendations": ["Please consult with a healthcare professional."],
+        "possible_conditions": [dict(_FALLBACK_COND)],
+        "recommendations": [_CONSULT_RECOMMENDATION],
         "severity_level": "Unknown",
         "seek_medical_attention": True
     }
@@ -138,7 +183,7 @@ def validate_response_structure(result):
 
     # Ensure possible_conditions exists and has correct structure
     if "possible_conditions" not in result or not isinstance(result["possible_conditions"], list):
-        result["possible_conditions"] = [{"condition": "Unknown", "probability": "Unknown"}]
+        result["possible_conditions"] = [dict(_UNKNOWN_COND)]
     else:
         # Ensure each condition has the right structure
         for i, condition in enumerate(result["possible_conditions"]):
@@ -150,7 +195,7 @@ def validate_response_structure(result):
                 result["possible_conditions"][i]["probability"] = "Unknown"
 
     if "recommendations" not in result or not isinstance(result["recommendations"], list):
-        result["recommendations"] = ["Please consult with a healthcare professional."]
+        result["recommendations"] = [_CONSULT_RECOMMENDATION]
 
     if "severity_level" not in result or not isinstance(result["severity_level"], str):
         result["severity_level"] = "Unknown"
@@ -163,41 +208,85 @@ def validate_response_structure(result):
 def parse_openai_response(response):
     """Parse the response from OpenAI API."""
     try:
-        # Modern OpenAI API (v1.0.0+)
+        # JSON mode guarantees the content is one valid JSON document, so a
+        # single parse replaces the old fenced-code-block regex extraction.
         content = response.choices[0].message.content
         logger.debug(f"Raw OpenAI response: {content}")
-
-        # Try to extract JSON from the response
-        try:
-            # First, try direct JSON parsing
-            result = json.loads(content)
-        except json.JSONDecodeError:
-            # If that fails, try to extract JSON from text
-            import re
-            json_match = re.search(r'```json\s*([\s\S]*?)\s*```', content) or re.search(r'```\s*([\s\S]*?)\s*```', content) or re.search(r'{[\s\S]*}', content)
-            if json_match:
-                try:
-                    json_content = json_match.group(1) if '```' in json_match.group(0) else json_match.group(0)
-                    # Clean up the extracted JSON string
-                    cleaned_json = re.sub(r'^\s*```.*\n(.*\n)*?\s*```', '', json_content, flags=re.MULTILINE)
-                    result = json.loads(cleaned_json)
-                except json.JSONDecodeError:
-                    # Fallback if JSON parsing fails
-                    logger.error("Could not parse JSON from OpenAI response")
-                    return create_fallback_response()
-            else:
-                # No JSON structure found
-                logger.error("No JSON structure found in OpenAI response")
-                return create_fallback_response()
-
-        # Validate and ensure the structure
-        return validate_response_structure(result)
-
-    except Exception as e:
+        result = orjson.loads(content)
+    except (orjson.JSONDecodeError, TypeError, AttributeError, IndexError) as e:
         logger.error(f"Error parsing OpenAI response: {str(e)}")
-        logger.error(traceback.format_exc())
         return create_fallback_response()
 
+    # Validate and ensure the structure
+    return validate_response_structure(result)
+
+# Generation budget for gpt-3.5-turbo. Input size is estimated at ~3
+# characters per token — tiktoken is not a dependency, and over-counting
+# errs toward smaller generation budgets rather than context overruns.
+_CONTEXT_LIMIT = 4096
+_RESPONSE_HEADROOM = 64
+_MAX_INPUT_TOKENS = 3500
+
+def _estimate_tokens(text: str) -> int:
+    """Pessimistic token-count estimate for budget sizing."""
+    return len(text) // 3 + 1
+
+_SYSTEM_MSG_TOKENS = _estimate_tokens(_SYSTEM_MSG)
+
+# Requests that need no model call: an empty symptom list has nothing to
+# analyze, and safety-critical keywords get a canned high-severity answer
+# immediately instead of after seconds of completion latency.
+_EMERGENCY_SYMPTOMS = frozenset({
+    "chest pain",
+    "shortness of breath",
+    "difficulty breathing",
+    "stroke",
+    "severe bleeding",
+    "loss of consciousness",
+    "seizure",
+})
+
+_EMERGENCY_RESPONSE = {
+    "possible_conditions": [{"condition": "Potentially serious condition", "probability": "High"}],
+    "recommendations": [
+        "Seek immediate medical attention or call emergency services.",
+        _CONSULT_RECOMMENDATION
+    ],
+    "severity_level": "High",
+    "seek_medical_attention": True
+}
+
+# Exact-match response cache: an identical prompt within the TTL reuses the
+# validated result instead of paying another multi-second, billed OpenAI
+# round-trip. A plain dict with monotonic expiries keeps this dependency-free;
+# expired entries are swept when the cache fills up.
+_CACHE_TTL = 3600.0
+_CACHE_MAX = 10_000
+_response_cache: Dict[str, tuple] = {}
+
+def _cache_key(prompt: str) -> str:
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+def _cache_get(key: str):
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    expires, value = entry
+    if time.monotonic() >= expires:
+        del _response_cache[key]
+        return None
+    return value
+
+def _cache_put(key: str, value: dict):
+    if len(_response_cache) >= _CACHE_MAX:
+        now = time.monotonic()
+        for stale in [k for k, (expires, _) in _response_cache.items() if expires <= now]:
+            _response_cache.pop(stale, None)
+        if len(_response_cache) >= _CACHE_MAX:
+            # Still full after the sweep: drop the oldest insertion
+            _response_cache.pop(next(iter(_response_cache)), None)
+    _response_cache[key] = (time.monotonic() + _CACHE_TTL, value)
+
 @router.post("/analyze", response_model=SymptomResponse)
 async def analyze_symptoms(symptom_data: SymptomRequest, background_tasks: BackgroundTasks, request: Request):
     """
@@ -205,37 +294,76 @@ async def analyze_symptoms(symptom_data: SymptomRequest, background_tasks: Backg
     """
     start_time = time.time()
     try:
-        if not openai_api_key:
+        # Answer trivial or safety-critical requests without a model call
+        symptoms_lower = {s.lower() for s in symptom_data.symptoms}
+        if not symptoms_lower:
+            background_tasks.add_task(log_symptom_check, symptom_data.age, symptom_data.gender)
+            background_tasks.add_task(
+                log_api_request, "/api/symptom-checker/analyze", 200, time.time() - start_time
+            )
+            return create_fallback_response()
+        if symptoms_lower & _EMERGENCY_SYMPTOMS:
+            background_tasks.add_task(log_symptom_check, symptom_data.age, symptom_data.gender)
+            background_tasks.add_task(
+                log_api_request, "/api/symptom-checker/analyze", 200, time.time() - start_time
+            )
+            return dict(_EMERGENCY_RESPONSE)
+
+        if not _get_api_key():
             raise HTTPException(status_code=500, detail="OpenAI API key not configured on the server")
 
-        # Sanitize input data
-        sanitized_data = SymptomRequest(
-            age=symptom_data.age,
-            gender=symptom_data.gender,
-            symptoms=[s for s in symptom_data.symptoms if isinstance(s, str)],
-            medical_history=[m for m in symptom_data.medical_history if isinstance(m, str)] if symptom_data.medical_history else [],
-            allergies=[a for a in symptom_data.allergies if isinstance(a, str)] if symptom_data.allergies else [],
-            medications=[m for m in symptom_data.medications if isinstance(m, str)] if symptom_data.medications else []
-        )
+        # Pydantic already validated and coerced every field on ingress
+        # (symptoms is guaranteed List[str]), so no second model build or
+        # isinstance filtering pass is needed here.
+        prompt = create_symptom_prompt(symptom_data)
 
-        # Prepare prompt for ChatGPT
-        prompt = create_symptom_prompt(sanitized_data)
+        # Serve repeated prompts straight from the cache
+        cache_key = _cache_key(prompt)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            background_tasks.add_task(log_symptom_check, symptom_data.age, symptom_data.gender)
+            background_tasks.add_task(
+                log_api_request, "/api/symptom-checker/analyze", 200, time.time() - start_time
+            )
+            return cached
+
+        # Size the generation budget to the input instead of always asking
+        # for 1000 tokens, and reject oversize prompts without burning a
+        # failed round-trip
+        input_tokens = _estimate_tokens(prompt) + _SYSTEM_MSG_TOKENS
+        if input_tokens > _MAX_INPUT_TOKENS:
+            result = create_fallback_response()
+            result["recommendations"].insert(
+                0, "The provided details were too long to analyze; please shorten them and try again."
+            )
+            background_tasks.add_task(log_symptom_check, symptom_data.age, symptom_data.gender)
+            background_tasks.add_task(
+                log_api_request, "/api/symptom-checker/analyze", 200, time.time() - start_time
+            )
+            return result
+        max_tokens = min(1000, _CONTEXT_LIMIT - input_tokens - _RESPONSE_HEADROOM)
 
         try:
             # Call OpenAI API using the modern client
-            response = client.chat.completions.create(
+            response = await get_client().chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
-                    {"role": "system", "content": "You are a helpful medical assistant. Analyze the symptoms provided and suggest possible conditions, recommendations, and whether medical attention should be sought. Format your response as JSON with keys 'possible_conditions' (array of objects with 'condition' and 'probability' fields), 'recommendations' (array of strings), 'severity_level' (string), and 'seek_medical_attention' (boolean)."},
+                    {"role": "system", "content": _SYSTEM_MSG},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.5,
-                max_tokens=1000
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
             )
 
             # Extract and parse the response
             result = parse_openai_response(response)
 
+            # Cache successful analyses only, so a transient parse failure
+            # isn't pinned for the whole TTL
+            if result.get("severity_level") != "Unknown":
+                _cache_put(cache_key, result)
+
             # Log the interaction without personal details
             background_tasks.add_task(log_symptom_check, symptom_data.age, symptom_data.gender)
 
@@ -246,8 +374,9 @@ async def analyze_symptoms(symptom_data: SymptomRequest, background_tasks: Backg
             return result
 
         except Exception as api_error:
-            logger.error(f"OpenAI API error: {str(api_error)}")
-            logger.error(traceback.format_exc())
+            # logger.exception attaches the traceback lazily: the stack is
+            # only formatted if a handler actually emits the record
+            logger.exception("OpenAI API error: %s", api_error)
             raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(api_error)}")
 
     except HTTPException:
@@ -255,10 +384,75 @@ async def analyze_symptoms(symptom_data: SymptomRequest, background_tasks: Backg
         raise
 
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())  # Log the full traceback
+        logger.exception("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.post("/analyze/stream")
+async def analyze_symptoms_stream(symptom_data: SymptomRequest, background_tasks: BackgroundTasks):
+    """
+    Stream the analysis as Server-Sent Events.
+
+    Tokens are forwarded as they arrive, so clients render output at
+    first-token latency instead of waiting out the full generation;
+    /analyze remains the buffered JSON form. Cache hits are replayed as a
+    single event.
+    """
+    start_time = time.time()
+    if not _get_api_key():
+        raise HTTPException(status_code=500, detail="OpenAI API key not configured on the server")
+
+    prompt = create_symptom_prompt(symptom_data)
+    background_tasks.add_task(log_symptom_check, symptom_data.age, symptom_data.gender)
+    background_tasks.add_task(
+        log_api_request, "/api/symptom-checker/analyze/stream", 200, time.time() - start_time
+    )
+
+    cached = _cache_get(_cache_key(prompt))
+
+    # Same input budget as /analyze; the cap would be pointless if the
+    # stream variant ignored it
+    input_tokens = _estimate_tokens(prompt) + _SYSTEM_MSG_TOKENS
+    oversize = input_tokens > _MAX_INPUT_TOKENS
+    max_tokens = min(1000, _CONTEXT_LIMIT - input_tokens - _RESPONSE_HEADROOM)
+
+    async def event_stream():
+        if cached is not None:
+            yield f"data: {orjson.dumps(cached).decode()}\n\n"
+            yield "data: [DONE]\n\n"
+            return
+        if oversize:
+            result = create_fallback_response()
+            result["recommendations"].insert(
+                0, "The provided details were too long to analyze; please shorten them and try again."
+            )
+            yield f"data: {orjson.dumps(result).decode()}\n\n"
+            yield "data: [DONE]\n\n"
+            return
+        try:
+            stream = await get_client().chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": _SYSTEM_MSG},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.5,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"},
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield f"data: {orjson.dumps(delta).decode()}\n\n"
+        except Exception as api_error:
+            # The response has already started, so surface the failure as a
+            # terminal fallback event instead of an HTTP error
+            logger.exception("OpenAI streaming error: %s", api_error)
+            yield f"data: {orjson.dumps(create_fallback_response()).decode()}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.post("/test", response_model=SymptomResponse)
 async def test_analyze(symptom_data: SymptomRequest):
     """Test endpoint that doesn't call OpenAI API."""
@@ -1,5 +1,24 @@
 # utils/helpers.py
 
+import logging
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Cache for now_iso(): formatting a timestamp costs a syscall plus string
+# building, which adds up under bursts of chat/socket traffic. The formatted
+# value is reused within a 1ms window.
+_ts_cache = [0.0, ""]
+
+def now_iso():
+    """Return the current time as an ISO-8601 string, cached at 1ms granularity."""
+    t = time.time()
+    if t - _ts_cache[0] > 0.001:
+        _ts_cache[0] = t
+        _ts_cache[1] = datetime.fromtimestamp(t).isoformat()
+    return _ts_cache[1]
+
 def sanitize_input(input_data):
     """Sanitize input data to prevent security issues."""
     # For now, just return the input data
@@ -12,4 +31,10 @@ def format_health_data(data):
 
 def log_api_request(endpoint, status_code, processing_time):
     """Log API request details."""
-    print(f"API Request: {endpoint}, Status: {status_code}, Processing Time: {processing_time:.4f}s")
\ No newline at end of file
+    # %-style args defer formatting to the handler thread (a no-op when the
+    # level is filtered), and the record flows through the queued logger
+    # instead of an unbuffered print
+    logger.info(
+        "API Request: %s, Status: %s, Processing Time: %.4fs",
+        endpoint, status_code, processing_time
+    )
\ No newline at end of file